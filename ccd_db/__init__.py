@@ -0,0 +1,6 @@
+'''
+Shared helpers for the state and district CCD database builds.
+
+The prep scripts in ccd_db/state and ccd_db/district are run from their own
+folder, so they put the repo root on sys.path before importing from here.
+'''
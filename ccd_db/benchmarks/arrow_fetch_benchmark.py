@@ -0,0 +1,98 @@
+'''
+Time pulling a 10M row membership query out of sqlite into a DataFrame:
+
+- the notebook's old way, pd.DataFrame(cursor.fetchall(), columns=...)
+- ccd_db.query.fetch_frame (the same, then nullable Int64 columns)
+- ccd_db.query.fetch_frame(arrow=True) (batches into Arrow arrays, handed
+  to pandas as ArrowDtype columns)
+
+Run from the repo root:
+    python ccd_db/benchmarks/arrow_fetch_benchmark.py
+
+Uses made up data shaped like district.db's membership table so it doesn't
+need the CCD files downloaded. Building the database takes a minute or two.
+'''
+#%%
+import os
+import sys
+import sqlite3
+import tempfile
+from time import perf_counter
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+from ccd_db import query
+from ccd_db.bulk_load import bulk_load
+
+N_ROWS = 10_000_000
+
+rng = np.random.default_rng(0)
+frame = pd.DataFrame({
+    'end_year': rng.integers(1987, 2025, N_ROWS),
+    'leaid': rng.integers(100000, 5700000, N_ROWS),
+    'grade_id': rng.integers(1, 20, N_ROWS),
+    'race_ethnicity_id': rng.integers(1, 9, N_ROWS),
+    'sex_id': rng.integers(1, 3, N_ROWS),
+    'total_indicator_id': rng.integers(1, 6, N_ROWS),
+    'student_count': pd.array(rng.integers(0, 500, N_ROWS), dtype='Int64')
+})
+# Some suppressed counts, like the real data.
+frame.loc[rng.random(N_ROWS) < 0.05, 'student_count'] = pd.NA
+
+path = os.path.join(tempfile.mkdtemp(), 'district.db')
+conn = sqlite3.connect(path)
+conn.execute('''
+    CREATE TABLE membership (
+        id INTEGER PRIMARY KEY,
+        end_year INTEGER,
+        leaid INTEGER,
+        student_count INTEGER,
+        race_ethnicity_id INTEGER,
+        grade_id INTEGER,
+        sex_id INTEGER,
+        total_indicator_id INTEGER,
+        dms_flag_id INTEGER
+    )
+''')
+bulk_load(conn, frame, 'membership')
+
+#%%
+###############################################################################
+# Time each fetch path
+###############################################################################
+
+SQL = '''
+    SELECT end_year, leaid, grade_id, race_ethnicity_id, sex_id,
+           total_indicator_id, student_count
+    FROM membership
+'''
+
+def fetchall_frame():
+    cursor = conn.execute(SQL)
+    return pd.DataFrame(cursor.fetchall(),
+                        columns=[column[0] for column in cursor.description])
+
+PATHS = {
+    'fetchall + DataFrame': fetchall_frame,
+    'fetch_frame': lambda: query.district_membership(conn, arrow=False),
+    'fetch_frame(arrow=True)': lambda: query.district_membership(conn)
+}
+
+results = {}
+for name, fetch in PATHS.items():
+    start = perf_counter()
+    result = fetch()
+    seconds = perf_counter() - start
+    results[name] = {'seconds': seconds,
+                     'MB': result.memory_usage(deep=True).sum() / 2**20}
+    assert len(result) == N_ROWS
+    del result
+
+conn.close()
+os.remove(path)
+
+print(f'{N_ROWS:,} rows')
+print(pd.DataFrame(results).T.round(2))
+
+# %%
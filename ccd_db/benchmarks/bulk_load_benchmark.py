@@ -0,0 +1,75 @@
+'''
+Benchmark bulk_load against DataFrame.to_sql on a membership-like table.
+
+Run from the repo root:
+    python ccd_db/benchmarks/bulk_load_benchmark.py
+
+Uses made up data so it doesn't need the CCD files downloaded.
+'''
+#%%
+import os
+import sys
+import sqlite3
+import tempfile
+from time import perf_counter
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+from ccd_db.bulk_load import bulk_load
+
+N_ROWS = 2_000_000
+
+rng = np.random.default_rng(0)
+frame = pd.DataFrame({
+    'end_year': rng.integers(1987, 2025, N_ROWS),
+    'leaid': rng.integers(100000, 5700000, N_ROWS),
+    'grade_id': rng.integers(1, 20, N_ROWS),
+    'race_ethnicity_id': rng.integers(1, 10, N_ROWS),
+    'sex_id': rng.integers(1, 4, N_ROWS),
+    'student_count': pd.array(rng.integers(0, 5000, N_ROWS), dtype='Int64')
+})
+# Some missing counts like the real thing.
+frame.loc[frame.sample(frac=0.05, random_state=0).index,
+          'student_count'] = pd.NA
+
+SCHEMA = '''
+CREATE TABLE membership (
+    id INTEGER PRIMARY KEY,
+    end_year INTEGER,
+    leaid INTEGER,
+    grade_id INTEGER,
+    race_ethnicity_id INTEGER,
+    sex_id INTEGER,
+    student_count INTEGER
+);
+'''
+
+def time_load(load):
+    '''Time load(conn) writing into a fresh database file.'''
+    with tempfile.TemporaryDirectory() as folder:
+        conn = sqlite3.connect(os.path.join(folder, 'bench.db'))
+        conn.executescript(SCHEMA)
+        start = perf_counter()
+        load(conn)
+        elapsed = perf_counter() - start
+        count = conn.execute('SELECT COUNT(*) FROM membership').fetchone()[0]
+        conn.close()
+    assert count == N_ROWS
+    return elapsed
+
+loaders = {
+    'to_sql': lambda conn: frame.to_sql('membership', conn,
+                                        if_exists='append', index=False),
+    'to_sql chunksize=100000': lambda conn: frame.to_sql(
+        'membership', conn, if_exists='append', index=False,
+        chunksize=100_000),
+    'bulk_load': lambda conn: bulk_load(conn, frame, 'membership')
+}
+
+#%%
+for name, load in loaders.items():
+    seconds = time_load(load)
+    print(f'{name:>25}: {seconds:6.2f}s  ({N_ROWS / seconds:,.0f} rows/s)')
+
+# %%
@@ -0,0 +1,108 @@
+'''
+Compare the rowid membership table (surrogate id plus an (end_year, leaid)
+index) against a WITHOUT ROWID table clustered on the natural key.
+
+district.db doesn't use the clustered layout. Its key columns would all
+have to be non-NULL and unique together, and the real data isn't: missing
+category labels come out of district_member_prep.py as NULL ids, and
+nothing makes staff unique on (end_year, leaid). The file was smaller, but
+one district's history was slower (end_year leads the key).
+
+Run from the repo root:
+    python ccd_db/benchmarks/clustered_benchmark.py
+
+Uses made up data so it doesn't need the CCD files downloaded.
+'''
+#%%
+import os
+import sys
+import sqlite3
+import tempfile
+from time import perf_counter
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+from ccd_db.bulk_load import bulk_load
+
+N_LEAS = 2000
+YEARS = range(1987, 2025)
+N_CATEGORIES = 40  # (grade, race, sex, total_indicator) combos per LEA/year
+
+rng = np.random.default_rng(0)
+years, leaids, categories = np.meshgrid(
+    np.array(YEARS), 100000 + np.arange(N_LEAS) * 17, np.arange(N_CATEGORIES),
+    indexing='ij')
+frame = pd.DataFrame({
+    'end_year': years.ravel(),
+    'leaid': leaids.ravel(),
+    'grade_id': categories.ravel() % 20,
+    'race_ethnicity_id': categories.ravel() // 20,
+    'sex_id': 1,
+    'total_indicator_id': 1,
+    'student_count': rng.integers(0, 5000, years.size)
+})
+
+COLUMNS = '''
+    end_year INTEGER,
+    leaid INTEGER,
+    grade_id INTEGER,
+    race_ethnicity_id INTEGER,
+    sex_id INTEGER,
+    total_indicator_id INTEGER,
+    student_count INTEGER'''
+
+LAYOUTS = {
+    'rowid + index': f'''
+        CREATE TABLE membership (id INTEGER PRIMARY KEY, {COLUMNS});
+    ''',
+    'WITHOUT ROWID': f'''
+        CREATE TABLE membership ({COLUMNS},
+            PRIMARY KEY (end_year, leaid, grade_id, race_ethnicity_id,
+                         sex_id, total_indicator_id)
+        ) WITHOUT ROWID;
+    '''
+}
+INDEX = 'CREATE INDEX idx_membership_end_year_leaid ON membership (end_year, leaid);'
+
+QUERIES = {
+    # One district's whole history.
+    'per LEA': ('SELECT end_year, SUM(student_count) FROM membership '
+                'WHERE leaid = ? GROUP BY end_year',
+                lambda: (int(rng.choice(frame['leaid'].unique())),)),
+    # Everything for one year.
+    'per year': ('SELECT leaid, SUM(student_count) FROM membership '
+                 'WHERE end_year = ? GROUP BY leaid',
+                 lambda: (int(rng.choice(YEARS)),))
+}
+REPEATS = 20
+
+#%%
+with tempfile.TemporaryDirectory() as folder:
+    for layout, ddl in LAYOUTS.items():
+        path = os.path.join(folder, layout.replace(' ', '_') + '.db')
+        conn = sqlite3.connect(path)
+        conn.executescript(ddl)
+
+        start = perf_counter()
+        bulk_load(conn, frame, 'membership')
+        if layout.startswith('rowid'):
+            conn.executescript(INDEX)
+        conn.execute('ANALYZE')
+        load_seconds = perf_counter() - start
+        megabytes = os.path.getsize(path) / 1e6
+        conn.close()
+
+        print(f'{layout}: load {load_seconds:.2f}s, {megabytes:.0f}MB')
+
+        for name, (sql, params) in QUERIES.items():
+            # Fresh connection so the page cache is cold-ish for each query.
+            conn = sqlite3.connect(path)
+            start = perf_counter()
+            for _ in range(REPEATS):
+                conn.execute(sql, params()).fetchall()
+            elapsed = (perf_counter() - start) / REPEATS
+            conn.close()
+            print(f'    {name:>8}: {elapsed * 1000:8.2f}ms per query')
+
+# %%
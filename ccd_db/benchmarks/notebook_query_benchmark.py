@@ -0,0 +1,170 @@
+'''
+Replay the queries state_level_eda.ipynb makes (through ccd_db.query)
+against a state.db with the old indexes and again with the ones in
+state_indexes.sql (covering indexes plus ANALYZE).
+
+Run from the repo root:
+    python ccd_db/benchmarks/notebook_query_benchmark.py
+
+Uses made up data shaped like the real tables (membership has a row per
+state/year/grade/race/sex combo, fiscal rows are ~400 columns wide) so it
+doesn't need the CCD or NAEP files downloaded.
+'''
+#%%
+import os
+import sys
+import sqlite3
+import tempfile
+from itertools import product
+from time import perf_counter
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+from ccd_db import query
+
+N_STATES = 57
+YEARS = range(1987, 2025)
+N_CATEGORIES = 600  # (grade, race, sex) combos per state/year
+N_FISCAL_COLUMNS = 400
+REPEATS = 5
+
+TOTAL = 'Derived - Education Unit Total minus Adult Education Count'
+
+rng = np.random.default_rng(0)
+states = [f'S{i:02d}' for i in range(N_STATES)]
+
+#%%
+###############################################################################
+# Queries from the notebook
+###############################################################################
+
+QUERIES = {
+    'naep, grade 8 (cells 4, 22, 25)':
+        lambda conn: query.naep_scores(conn, grade=8),
+    'naep, math R3 (cell 8)':
+        lambda conn: query.naep_scores(conn, subject='MAT',
+                                       accommodations='R3'),
+    'naep, reading R3 (cell 10)':
+        lambda conn: query.naep_scores(conn, subject='RED',
+                                       accommodations='R3'),
+    'naep, R3 (cell 19)':
+        lambda conn: query.naep_scores(conn, accommodations='R3'),
+    'spending per student (cells 12, 19)':
+        lambda conn: query.per_pupil_spending(
+            conn, exclude=query.FISCAL_EXCLUDED),
+    'spending per student, all (cells 22, 25)':
+        lambda conn: query.per_pupil_spending(conn),
+    'spending per student, national (cell 22)':
+        lambda conn: query.per_pupil_spending(conn, national=True)
+}
+
+#%%
+###############################################################################
+# Made up state.db
+###############################################################################
+
+naep = pd.DataFrame(
+    list(product(range(1990, 2025, 2), ['R2', 'R3'], ['MAT', 'RED'],
+                 [4, 8, 12], states + ['NT', 'XQ', 'XR', 'DC'])),
+    columns=['end_year', 'accommodations', 'math_read', 'grade',
+             'jurisdiction'])
+naep['scale'] = 'MRPCM'
+naep['errorFlag'] = 0
+naep['mean'] = rng.normal(270, 10, len(naep))
+naep['sd'] = rng.normal(35, 3, len(naep))
+
+years, fipsts, categories = np.meshgrid(
+    np.array(YEARS), np.arange(N_STATES), np.arange(N_CATEGORIES),
+    indexing='ij')
+membership = pd.DataFrame({
+    'end_year': years.ravel(),
+    'fipst': fipsts.ravel(),
+    'racecat': categories.ravel() % 8,
+    'student_count': rng.integers(0, 50000, years.size),
+    'race_ethnicity': 'White',
+    'grade': 'Grade 1',
+    'sex': 'Female',
+    # One state/year total, the rest spread over a few other indicators.
+    'total_indicator': np.where(
+        categories.ravel() == 0, TOTAL,
+        np.array(['Category Set A - By Race/Ethnicity; Sex; Grade',
+                  'Subtotal 4 - By Grade',
+                  'Education Unit Total'])[categories.ravel() % 3]),
+    'dms_flag': 'Reported'
+})
+
+years, fipsts = np.meshgrid(np.array(YEARS), np.arange(N_STATES),
+                            indexing='ij')
+fiscal = pd.DataFrame(
+    rng.integers(0, 10**9, (years.size, N_FISCAL_COLUMNS)),
+    columns=[f'x{i}' for i in range(N_FISCAL_COLUMNS)])
+fiscal.insert(0, 'end_year', years.ravel())
+fiscal.insert(1, 'fipst', fipsts.ravel())
+fiscal.insert(2, 'stabr', np.array(states)[fipsts.ravel()])
+fiscal.insert(3, 'te11', rng.integers(10**8, 10**11, years.size))
+
+OLD_INDEXES = '''
+    CREATE INDEX idx_membership_end_year_fipst
+        ON membership (end_year, fipst);
+    CREATE INDEX idx_fiscal_end_year_fipst ON fiscal (end_year, fipst);
+    CREATE INDEX idx_membership_total_indicator
+        ON membership (total_indicator);
+'''
+
+with open('ccd_db/state/state_indexes.sql', encoding='utf-8') as sql_file:
+    NEW_INDEXES = sql_file.read()
+
+#%%
+###############################################################################
+# Time each query
+###############################################################################
+
+def time_queries(indexes):
+    ''' Best of REPEATS seconds for each notebook query on a fresh file. '''
+    path = os.path.join(tempfile.mkdtemp(), 'state.db')
+    conn = sqlite3.connect(path)
+    for name, frame in [('naep', naep), ('membership', membership),
+                        ('fiscal', fiscal)]:
+        frame.to_sql(name, conn, index=False)
+    conn.executescript(f'''
+        CREATE TABLE enrollment_totals (
+            end_year INTEGER,
+            fipst INTEGER,
+            total INTEGER,
+            total_less_ae INTEGER,
+            PRIMARY KEY (end_year, fipst)
+        );
+        INSERT INTO enrollment_totals
+        SELECT end_year, fipst, NULL,
+            SUM(CASE WHEN total_indicator = '{TOTAL}'
+                THEN student_count END)
+        FROM membership
+        GROUP BY end_year, fipst;
+    ''')
+    conn.executescript(indexes)
+    conn.commit()
+
+    times = {}
+    for name, run in QUERIES.items():
+        best = float('inf')
+        for _ in range(REPEATS):
+            start = perf_counter()
+            run(conn)
+            best = min(best, perf_counter() - start)
+        times[name] = best
+
+    conn.close()
+    os.remove(path)
+    return times
+
+before = time_queries(OLD_INDEXES)
+after = time_queries(NEW_INDEXES)
+
+results = pd.DataFrame({'before (ms)': pd.Series(before) * 1000,
+                        'after (ms)': pd.Series(after) * 1000})
+results['speedup'] = results['before (ms)'] / results['after (ms)']
+print(f'{len(membership):,} membership rows, {len(naep):,} naep rows')
+print(results.round(2))
+
+# %%
@@ -0,0 +1,473 @@
+'''
+Build state.db and district.db by running the pipeline scripts in order.
+
+Each pipeline is a set of stages (one script each) and the stages they have
+to wait for:
+
+    download -> layout -> whole -> directory/staff/membership/fiscal ->
+                          create ->     per_pupil -> indexes -> optimize
+
+The two pipelines don't share anything so they run at the same time, and so
+do the stages within a pipeline that don't depend on each other (eg. the
+district directory, staff and membership prep). Each script runs in its own
+process from its pipeline folder, just like running it by hand.
+
+Several scripts in a pipeline write the same database, but sqlite only lets
+one of them write at a time: replace_partitions takes the write lock with
+BEGIN IMMEDIATE and the others wait on it (see connect in bulk_load.py). The
+parsing, which is most of the time, still happens in parallel.
+
+Only stages that are out of date are run. Each stage lists the files it
+reads (inputs), writes (outputs) and the database it loads, and gets a
+fingerprint from the hashes of its script, the ccd_db modules the script
+imports (and the ones they import), and its inputs. A stage that writes a
+database passes on the id of its last run, which goes into the fingerprint
+of the stages after it. A stage is rerun if its fingerprint isn't the one
+saved in build_manifest.json from its last successful run, or if one of its
+outputs or its database is missing. So editing
+district_staff_prep.py reruns the staff stage (and the indexes after it) but
+not district_whole_prep.py. File hashes are cached in the manifest by size
+and modification time so unchanged files aren't read again.
+
+Run from the repo root, eg.
+    python ccd_db/build.py
+    python ccd_db/build.py district --skip download layout
+    python ccd_db/build.py state --force fiscal
+'''
+
+import os
+import re
+import sys
+import glob
+import json
+import uuid
+import hashlib
+import argparse
+import threading
+import subprocess
+from datetime import datetime
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_PATH = os.path.join(REPO_ROOT, 'ccd_db', 'build_manifest.json')
+
+# Stages run in threads but the manifest is one dict.
+MANIFEST_LOCK = threading.Lock()
+
+# stage: {'script': script in the pipeline folder,
+#         'after': stages that have to finish first,
+#         'inputs': files (globs, from the pipeline folder) the script reads,
+#         'outputs': files the script writes, if any,
+#         'database': the database the script writes, if it does,
+#         'skip_if_exists': optional file that means the stage isn't needed}
+PIPELINES = {
+    'district': {
+        'download': {'script': 'district_data_download.py',
+                     'after': [],
+                     'inputs': [],
+                     'outputs': ['data/nonfiscal/directory/directory_2*.csv',
+                                 'data/nonfiscal/membership/membership_2*.csv',
+                                 'data/nonfiscal/staff/staff_2*.csv',
+                                 'data/nonfiscal/whole/whole_*',
+                                 'data/fiscal/fiscal_*.csv']},
+        'layout': {'script': 'district_layout_prep.py',
+                   'after': ['download'],
+                   'inputs': [],
+                   'outputs': ['data/nonfiscal/whole/layouts.csv']},
+        'whole': {'script': 'district_whole_prep.py',
+                  'after': ['layout'],
+                  'inputs': ['data/nonfiscal/whole/whole_*',
+                             'data/nonfiscal/whole/layouts.csv'],
+                  'outputs': [
+                      'data/nonfiscal/directory/'
+                      'directory_through_2014.parquet',
+                      'data/nonfiscal/staff/staff_through_2014.parquet',
+                      'data/nonfiscal/membership/'
+                      'membership_through_2014.parquet'
+                  ]},
+        # The schema can only be run on a new database.
+        'create': {'script': 'district_db_creation.py',
+                   'after': [],
+                   'inputs': ['district_schema.sql'],
+                   'outputs': [],
+                   'database': 'data/district.db',
+                   'skip_if_exists': 'data/district.db'},
+        'directory': {'script': 'district_directory_prep.py',
+                      'after': ['whole', 'create'],
+                      'inputs': ['data/nonfiscal/directory/directory_*',
+                                 '../jurisdictions.csv'],
+                      'outputs': [],
+                      'database': 'data/district.db'},
+        'staff': {'script': 'district_staff_prep.py',
+                  'after': ['whole', 'create'],
+                  'inputs': ['data/nonfiscal/staff/staff_*'],
+                  'outputs': [],
+                  'database': 'data/district.db'},
+        'membership': {'script': 'district_member_prep.py',
+                       'after': ['whole', 'create'],
+                       'inputs': [
+                           'data/nonfiscal/membership/membership_*'],
+                       'outputs': [],
+                       'database': 'data/district.db'},
+        # Uses the leaid_crosswalk names from the directory.
+        'fiscal': {'script': 'district_fiscal_prep.py',
+                   'after': ['download', 'create', 'directory'],
+                   'inputs': ['data/fiscal/fiscal_*.csv',
+                              'data/fiscal/sdf921alay.txt'],
+                   'outputs': [],
+                   'database': 'data/district.db'},
+        # Reads fiscal and the enrollment_totals membership fills in.
+        'per_pupil': {'script': 'district_per_pupil_prep.py',
+                      'after': ['fiscal', 'membership'],
+                      'inputs': ['../cpi_u_annual.csv'],
+                      'outputs': [],
+                      'database': 'data/district.db'},
+        'indexes': {'script': 'district_db_indexes.py',
+                    'after': ['directory', 'staff', 'membership', 'fiscal',
+                              'per_pupil'],
+                    'inputs': ['district_indexes.sql'],
+                    'outputs': [],
+                    'database': 'data/district.db'},
+        # Compacts the finished database, so it has to come last.
+        'optimize': {'script': 'district_db_optimize.py',
+                     'after': ['indexes'],
+                     'inputs': [],
+                     'outputs': [],
+                     'database': 'data/district.db'}
+    },
+    'state': {
+        'download': {'script': 'state_data_download.py',
+                     'after': [],
+                     'inputs': [],
+                     'outputs': ['data/nonfiscal/directory/directory_2*.csv',
+                                 'data/nonfiscal/membership/membership_2*.csv',
+                                 'data/nonfiscal/staff/staff_2*.csv',
+                                 'data/nonfiscal/whole/whole_*',
+                                 'data/fiscal/fiscal_*']},
+        'layout': {'script': 'state_layout_prep.py',
+                   'after': ['download'],
+                   'inputs': [],
+                   'outputs': ['data/nonfiscal/whole/layouts.csv']},
+        'fiscal_layout': {'script': 'state_fiscal_layout_prep.py',
+                          'after': ['download'],
+                          'inputs': [],
+                          'outputs': ['data/fiscal/layouts/layouts.csv']},
+        'whole': {'script': 'state_whole_prep.py',
+                  'after': ['layout'],
+                  'inputs': ['data/nonfiscal/whole/whole_*',
+                             'data/nonfiscal/whole/layouts.csv',
+                             'crosswalk.csv'],
+                  'outputs': [
+                      'data/nonfiscal/directory/'
+                      'directory_through_2014.parquet',
+                      'data/nonfiscal/staff/staff_through_2014.parquet',
+                      'data/nonfiscal/membership/'
+                      'membership_through_2014.parquet'
+                  ]},
+        'create': {'script': 'state_db_creation.py',
+                   'after': [],
+                   'inputs': ['state_schema.sql'],
+                   'outputs': [],
+                   'database': 'data/state.db',
+                   'skip_if_exists': 'data/state.db'},
+        'directory': {'script': 'state_directory_prep.py',
+                      'after': ['whole', 'create'],
+                      'inputs': ['data/nonfiscal/directory/directory_*',
+                                 '../jurisdictions.csv'],
+                      'outputs': [],
+                      'database': 'data/state.db'},
+        'staff': {'script': 'state_staff_prep.py',
+                  'after': ['whole', 'create'],
+                  'inputs': ['data/nonfiscal/staff/staff_*'],
+                  'outputs': [],
+                  'database': 'data/state.db'},
+        'membership': {'script': 'state_member_prep.py',
+                       'after': ['whole', 'create'],
+                       'inputs': [
+                           'data/nonfiscal/membership/membership_*'],
+                       'outputs': [],
+                       'database': 'data/state.db'},
+        'fiscal': {'script': 'state_fiscal_prep.py',
+                   'after': ['fiscal_layout', 'create'],
+                   'inputs': ['data/fiscal/fiscal_*',
+                              'data/fiscal/layouts/layouts.csv',
+                              'fiscal_var_crosswalk.csv'],
+                   'outputs': [],
+                   'database': 'data/state.db'},
+        # Everything comes from the NAEP API so there are no input files.
+        'naep': {'script': 'state_naep_prep.py',
+                 'after': ['create'],
+                 'inputs': [],
+                 'outputs': ['data/naep/raw_naep.txt'],
+                 'database': 'data/state.db'},
+        # Reads fiscal and the enrollment_totals membership fills in.
+        'per_pupil': {'script': 'state_per_pupil_prep.py',
+                      'after': ['fiscal', 'membership'],
+                      'inputs': ['../cpi_u_annual.csv'],
+                      'outputs': [],
+                      'database': 'data/state.db'},
+        'indexes': {'script': 'state_db_indexes.py',
+                    'after': ['directory', 'staff', 'membership', 'fiscal',
+                              'naep', 'per_pupil'],
+                    'inputs': ['state_indexes.sql'],
+                    'outputs': [],
+                    'database': 'data/state.db'},
+        # Compacts the finished database, so it has to come last.
+        'optimize': {'script': 'state_db_optimize.py',
+                     'after': ['indexes'],
+                     'inputs': [],
+                     'outputs': [],
+                     'database': 'data/state.db'}
+    }
+}
+
+def pipeline_folder(pipeline):
+    ''' Folder the pipeline's scripts live in (and are run from). '''
+    return os.path.join(REPO_ROOT, 'ccd_db', pipeline)
+
+def load_manifest():
+    ''' The saved fingerprints, run ids and file hash cache. '''
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    return {'stages': {}, 'files': {}}
+
+def save_manifest(manifest):
+    ''' Write the manifest (to a temp file first so it's never half written). '''
+    with MANIFEST_LOCK:
+        with open(MANIFEST_PATH + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=1, sort_keys=True)
+        os.replace(MANIFEST_PATH + '.tmp', MANIFEST_PATH)
+
+def file_hash(path, manifest):
+    '''
+    sha256 of a file. Reuses the hash in the manifest if the file's size and
+    modification time haven't changed since it was last hashed.
+    '''
+    info = os.stat(path)
+    key = os.path.relpath(path, REPO_ROOT)
+    with MANIFEST_LOCK:
+        cached = manifest['files'].get(key)
+    if cached and cached[:2] == [info.st_size, info.st_mtime_ns]:
+        return cached[2]
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            sha.update(chunk)
+
+    with MANIFEST_LOCK:
+        manifest['files'][key] = [info.st_size, info.st_mtime_ns,
+                                  sha.hexdigest()]
+    return sha.hexdigest()
+
+def expand(folder, patterns):
+    ''' All the files matching the glob patterns, in a fixed order. '''
+    return sorted({path for pattern in patterns
+                   for path in glob.glob(os.path.join(folder, pattern))
+                   if os.path.isfile(path)})
+
+def ccd_db_modules(path, found=None):
+    '''
+    Paths of the ccd_db modules the file at path imports, and the ones those
+    import, and so on (eg. per_pupil.py -> inflation.py -> bulk_load.py).
+    '''
+    found = set() if found is None else found
+    with open(path, 'r', encoding='utf-8') as file:
+        source = file.read()
+
+    names = re.findall(r'^\s*(?:from|import) ccd_db\.(\w+)', source,
+                       flags=re.M)
+    for group in re.findall(r'^\s*from ccd_db import \(?([\w, ]+)', source,
+                            flags=re.M):
+        names += [name.strip() for name in group.split(',') if name.strip()]
+
+    for name in names:
+        module = os.path.join(REPO_ROOT, 'ccd_db', name + '.py')
+        if module not in found and os.path.exists(module):
+            found.add(module)
+            ccd_db_modules(module, found)
+    return found
+
+def stage_fingerprint(stage, stages, manifest):
+    '''
+    Hash of everything a stage's result depends on: its script, the ccd_db
+    modules the script imports (directly or through other ccd_db modules),
+    its input files, and the last run of each stage before it that writes a
+    database (or nothing else a stage could list as an input).
+    '''
+    folder = pipeline_folder(stage['pipeline'])
+    script = os.path.join(folder, stage['script'])
+
+    sha = hashlib.sha256()
+    code = [script] + sorted(ccd_db_modules(script))
+    for path in code + expand(folder, stage['inputs']):
+        sha.update(os.path.relpath(path, REPO_ROOT).encode())
+        sha.update(file_hash(path, manifest).encode())
+
+    for other in stage['after']:
+        if stages[other].get('database') or not stages[other]['outputs']:
+            with MANIFEST_LOCK:
+                run_id = manifest['stages'].get(other, {}).get('run_id', '')
+            sha.update(f'{other}={run_id}'.encode())
+
+    return sha.hexdigest()
+
+def build_stages(pipelines, skip=()):
+    '''
+    Flatten PIPELINES into {'pipeline:stage': stage} for the pipelines asked
+    for, with 'after' also written as 'pipeline:stage'. Stages named in skip
+    (eg. 'download' or 'district:download') are left out and anything
+    waiting on them doesn't wait.
+    '''
+    stages = {}
+    for pipeline in pipelines:
+        for name, stage in PIPELINES[pipeline].items():
+            if name in skip or f'{pipeline}:{name}' in skip:
+                continue
+            stages[f'{pipeline}:{name}'] = {
+                **stage,
+                'pipeline': pipeline,
+                'after': [f'{pipeline}:{other}' for other in stage['after']]
+            }
+
+    for stage in stages.values():
+        stage['after'] = [other for other in stage['after']
+                          if other in stages]
+    return stages
+
+def run_stage(key, stage, stages, manifest, force=False):
+    '''
+    Run one stage's script in its pipeline folder if it's out of date (or
+    force is True). Output goes to logs/<pipeline>_<stage>.log. Returns a
+    dict with the status ('ran', 'fresh', 'skipped' or 'failed'), how long it
+    took, and the stage's fingerprint.
+    '''
+    folder = pipeline_folder(stage['pipeline'])
+    skip_file = stage.get('skip_if_exists')
+    if skip_file and os.path.exists(os.path.join(folder, skip_file)):
+        print(f'{key}: {skip_file} already exists, skipping')
+        return {'status': 'skipped'}
+
+    fingerprint = stage_fingerprint(stage, stages, manifest)
+    with MANIFEST_LOCK:
+        previous = manifest['stages'].get(key, {})
+    # A deleted database counts as a missing output, so the creation stage
+    # makes a new one and everything after it reloads it.
+    outputs = stage['outputs'] + ([stage['database']]
+                                  if stage.get('database') else [])
+    outputs_there = all(expand(folder, [pattern]) for pattern in outputs)
+    if (not force and outputs_there
+            and previous.get('fingerprint') == fingerprint):
+        print(f'{key}: up to date')
+        return {'status': 'fresh'}
+
+    os.makedirs(os.path.join(folder, 'logs'), exist_ok=True)
+    log_path = os.path.join(folder, 'logs', key.replace(':', '_') + '.log')
+    python_path = [REPO_ROOT]
+    if 'PYTHONPATH' in os.environ:
+        python_path.append(os.environ['PYTHONPATH'])
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(python_path)}
+
+    print(f'{key}: running {stage["script"]}')
+    start = perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        result = subprocess.run([sys.executable, stage['script']],
+                                cwd=folder, env=env, stdout=log,
+                                stderr=subprocess.STDOUT, check=False)
+    if result.returncode != 0:
+        return {'status': 'failed', 'returncode': result.returncode}
+
+    # Fingerprint again afterwards: some scripts tidy up their input files in
+    # place (eg. the 2016 state fiscal file), and what's saved should match
+    # the files as they are now.
+    return {'status': 'ran', 'seconds': perf_counter() - start,
+            'fingerprint': stage_fingerprint(stage, stages, manifest)}
+
+def run_build(stages, jobs=None, force=()):
+    '''
+    Run the stages, each one as soon as everything in its 'after' list is
+    done, up to jobs at a time. If a stage fails the stages downstream of it
+    aren't run, but unrelated ones keep going. Stages in force (or all of
+    them if force is None) are run even if they're up to date. Returns the
+    failed stages.
+    '''
+    done, failed, running = set(), set(), {}
+    waiting = dict(stages)
+    manifest = load_manifest()
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        while waiting or running:
+            # Drop anything that can't run because something upstream failed.
+            # PIPELINES lists stages after the ones they wait on, so one pass
+            # carries it all the way down.
+            for key, stage in list(waiting.items()):
+                if any(other in failed for other in stage['after']):
+                    print(f'{key}: not run, upstream stage failed')
+                    failed.add(key)
+                    del waiting[key]
+
+            for key, stage in list(waiting.items()):
+                if all(other in done for other in stage['after']):
+                    forced = force is None or key in force or \
+                        key.split(':')[1] in force
+                    running[pool.submit(run_stage, key, stage, stages,
+                                        manifest, forced)] = key
+                    del waiting[key]
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                key = running.pop(future)
+                result = future.result()
+                if result['status'] == 'failed':
+                    print(f'{key}: FAILED (exit code {result["returncode"]}), '
+                          f'see the log in {stages[key]["pipeline"]}/logs')
+                    failed.add(key)
+                    continue
+
+                if result['status'] == 'ran':
+                    print(f'{key}: done in {result["seconds"]:.0f}s')
+                    with MANIFEST_LOCK:
+                        manifest['stages'][key] = {
+                            'fingerprint': result['fingerprint'],
+                            'run_id': uuid.uuid4().hex,
+                            'finished_at': datetime.now().isoformat(
+                                timespec='seconds')
+                        }
+                    save_manifest(manifest)
+                done.add(key)
+
+    return failed
+
+def main():
+    ''' Command line entry point. '''
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('pipelines', nargs='*', default=list(PIPELINES),
+                        choices=list(PIPELINES),
+                        help='pipelines to build (default: all)')
+    parser.add_argument('--skip', nargs='*', default=[],
+                        help='stages to leave out, eg. download or '
+                             'district:download')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='how many scripts to run at once '
+                             '(default: number of cores)')
+    parser.add_argument('--force', nargs='*', default=None,
+                        help='stages to run even if they are up to date '
+                             '(all of them if none are named)')
+    args = parser.parse_args()
+
+    if args.force is None:
+        force = ()
+    else:
+        force = args.force or None  # --force on its own means everything
+
+    failed = run_build(build_stages(args.pipelines, args.skip), args.jobs,
+                       force)
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+'''
+Bulk loader for the build scripts, used instead of DataFrame.to_sql.
+
+to_sql inserts in small batches inside the default journaling and adapts
+every value row by row. bulk_load does the whole frame in one explicit
+transaction with big executemany batches, turning each column into a numpy
+object array of plain Python values (None for NA) a batch at a time, and
+relaxes the durability pragmas while it runs. The pragmas are put back when
+it's done, so the finished database file is the same as before.
+
+Turning off durability is fine here because a failed build is just run
+again from the csv files.
+
+replace_partitions is what the prep scripts use: it swaps out just the
+end_year partitions a run produced, so reruns and yearly updates don't
+duplicate rows or need a full rebuild. See benchmarks/bulk_load_benchmark.py
+for timings against to_sql.
+'''
+
+import uuid
+import sqlite3
+from contextlib import contextmanager
+import numpy as np
+
+# Integer categories and the like can come out of pandas as numpy scalars,
+# which sqlite3 doesn't know how to bind.
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.int32, int)
+sqlite3.register_adapter(np.int8, int)
+sqlite3.register_adapter(np.float64, float)
+sqlite3.register_adapter(np.bool_, bool)
+
+# How long (in seconds) a build script waits on another one that's writing
+# the same database. ccd_db/build.py runs independent scripts at the same time
+# and sqlite only allows one writer at a time.
+BUSY_TIMEOUT = 3600
+
+BUILD_PRAGMAS = {
+    'journal_mode': 'MEMORY',  # OFF would make a failed load unrecoverable
+    'synchronous': 'OFF',
+    'cache_size': -512000,     # in KiB, so about 500MB
+    'temp_store': 'MEMORY'
+}
+
+def connect(path):
+    '''
+    sqlite3.connect with a busy timeout long enough to wait out another build
+    script's load instead of failing with "database is locked".
+    '''
+    return sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+
+def set_pragmas(conn, pragmas):
+    '''
+    Set the given pragmas and return their old values (so they can be passed
+    back in to undo the change).
+    '''
+    old = {name: conn.execute(f'PRAGMA {name}').fetchone()[0]
+           for name in pragmas}
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+    return old
+
+def frame_rows(frame):
+    '''
+    Iterate over the rows of frame as tuples of Python values with None for
+    any kind of NA. Goes column by column with numpy instead of itertuples.
+    '''
+    columns = [frame[col].to_numpy(dtype=object, na_value=None)
+               for col in frame.columns]
+    return zip(*columns)
+
+def select_years(frame, years, year_col='end_year'):
+    '''
+    Only the rows of frame for the given years, or all of frame if years is
+    None. For the LOAD_YEARS setting in the prep scripts.
+    '''
+    if years is None:
+        return frame
+    return frame[frame[year_col].isin(years)]
+
+@contextmanager
+def build_transaction(conn):
+    '''
+    Run the body of the with block as one write transaction with the
+    BUILD_PRAGMAS set. Commits at the end, rolls back if anything fails and
+    puts the old pragmas back either way. BEGIN IMMEDIATE takes the write
+    lock up front so two scripts writing the same database wait on each other
+    instead of failing halfway through.
+    '''
+    # journal_mode can't be changed inside a transaction.
+    if conn.in_transaction:
+        conn.commit()
+    old_pragmas = set_pragmas(conn, BUILD_PRAGMAS)
+
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        set_pragmas(conn, old_pragmas)
+
+def stamp_build(conn, source):
+    '''
+    Give the database a new build id in build_info. Every load does this, so
+    anything cached from an older version of the data (see ccd_db/cache.py)
+    is never used again. Doesn't commit.
+    '''
+    # Databases made before build_info was in the schema don't have it yet.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS build_info (
+            build_id TEXT,
+            source TEXT,
+            built_at TEXT
+        )
+    ''')
+    conn.execute('DELETE FROM build_info')
+    conn.execute(
+        "INSERT INTO build_info VALUES (?, ?, datetime('now'))",
+        (uuid.uuid4().hex, source)
+    )
+
+def insert_rows(conn, frame, table, batch_size=100_000):
+    '''
+    executemany every row of frame into table, matching columns by name.
+    Doesn't commit, so call it inside build_transaction.
+    '''
+    columns = ', '.join(f'"{col}"' for col in frame.columns)
+    placeholders = ', '.join('?' * len(frame.columns))
+    sql = f'INSERT INTO {table} ({columns}) VALUES ({placeholders})'
+
+    for start in range(0, len(frame), batch_size):
+        conn.executemany(sql, frame_rows(frame.iloc[start:start + batch_size]))
+
+def bulk_load(conn, frame, table, batch_size=100_000):
+    '''
+    Insert every row of frame into an existing table, matching columns by
+    name. It's all one transaction: if anything fails nothing is inserted.
+    '''
+    with build_transaction(conn):
+        insert_rows(conn, frame, table, batch_size)
+
+def replace_table(conn, frame, table, batch_size=100_000):
+    '''
+    Replace everything in table with frame, in one transaction. For the small
+    tables without an end_year (eg. state).
+    '''
+    with build_transaction(conn):
+        conn.execute(f'DELETE FROM {table}')
+        insert_rows(conn, frame, table, batch_size)
+        stamp_build(conn, f'replace_table({table})')
+
+def replace_partitions(conn, frames, source, year_col='end_year',
+                       batch_size=100_000):
+    '''
+    Load each frame in frames ({table: frame}) in place of the rows already
+    in that table for the same years. Only the years that are in the frame
+    are touched, so a script can be rerun without duplicating rows, and next
+    year's release can be loaded without rebuilding the rest. All the tables
+    are done in one transaction and each (table, year) gets a row in
+    load_log saying how many rows came from which script (source), and the
+    database gets a new build id.
+    '''
+    with build_transaction(conn):
+        swap_partitions(conn, frames, source, year_col, batch_size)
+
+def swap_partitions(conn, frames, source, year_col='end_year',
+                    batch_size=100_000):
+    '''
+    replace_partitions without the transaction: doesn't commit, so call it
+    inside build_transaction when something else (eg. a summary table
+    worked out from the new rows) has to change in the same transaction.
+    '''
+    for table, frame in frames.items():
+        row_counts = frame.groupby(year_col).size()
+        years = ', '.join(str(int(year)) for year in row_counts.index)
+
+        if years:
+            conn.execute(
+                f'DELETE FROM {table} WHERE {year_col} IN ({years})'
+            )
+        insert_rows(conn, frame, table, batch_size)
+
+        conn.executemany('''
+            INSERT OR REPLACE INTO load_log
+                (table_name, end_year, row_count, source, loaded_at)
+            VALUES (?, ?, ?, ?, datetime('now'))
+        ''', [(table, int(year), int(count), source)
+              for year, count in row_counts.items()])
+
+    stamp_build(conn, source)
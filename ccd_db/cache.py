@@ -0,0 +1,117 @@
+'''
+On-disk cache of query results for ccd_db.query.
+
+state.db and district.db only change when the build loads data, but the
+notebook runs the same NAEP and fiscal queries every time the kernel
+restarts. Results are saved as Parquet files in CACHE_DIR, keyed on the SQL
+(with the whitespace normalized), the parameters, how the result was asked
+for (Arrow or numpy columns and their dtypes) and the database's build id.
+Every load stamps a new build id into build_info (see stamp_build in
+bulk_load.py), so results from before a rebuild are never read again; they
+just age out. Reading a result counts as using it, and the least recently
+used files are deleted once the cache is bigger than MAX_BYTES.
+
+Turn it on for everything in ccd_db.query with
+
+    query.USE_CACHE = True
+'''
+
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import pandas as pd
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         '.query_cache')
+MAX_BYTES = 512 * 2**20
+
+def normalize_sql(sql):
+    '''
+    sql with runs of whitespace (outside of quoted strings) made a single
+    space and any trailing semicolon dropped, so reformatting a query doesn't
+    miss the cache.
+    '''
+    parts = re.split(r"('(?:[^']|'')*')", sql)
+    parts = [part if i % 2 else re.sub(r'\s+', ' ', part)
+             for i, part in enumerate(parts)]
+    return ''.join(parts).strip().rstrip(';').strip()
+
+def build_id(conn):
+    '''
+    The id stamped in build_info by the last load. Databases without one fall
+    back on the file's size and modification time.
+    '''
+    try:
+        row = conn.execute('SELECT build_id FROM build_info').fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    if row is not None:
+        return row[0]
+
+    path = next(row[2] for row in conn.execute('PRAGMA database_list')
+                if row[1] == 'main')
+    if not path:
+        return None  # in memory, nothing to key on
+    stat = os.stat(path)
+    return f'{stat.st_size}-{stat.st_mtime_ns}'
+
+def cache_key(sql, params, build, options=None):
+    '''
+    File name (without .parquet) for a query result. options is anything
+    else that changes what the result looks like (eg. fetch_frame's arrow
+    flag and dtypes), as a dict of JSON-able values.
+    '''
+    text = json.dumps([normalize_sql(sql), list(params), build,
+                       options or {}], default=str, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+    '''
+    Delete the least recently used results until the cache fits in
+    max_bytes.
+    '''
+    files = [entry for entry in os.scandir(cache_dir)
+             if entry.name.endswith('.parquet')]
+    files.sort(key=lambda entry: entry.stat().st_mtime_ns)
+    total = sum(entry.stat().st_size for entry in files)
+
+    for entry in files:
+        if total <= max_bytes:
+            break
+        total -= entry.stat().st_size
+        os.remove(entry.path)
+
+def cached_frame(conn, sql, params, fetch, options=None, cache_dir=CACHE_DIR,
+                 max_bytes=MAX_BYTES):
+    '''
+    The result of sql with params from the cache, or else from fetch() (which
+    should run the query and return a DataFrame), saving it for next time.
+    options goes into the key (see cache_key).
+    '''
+    build = build_id(conn)
+    if build is None:
+        return fetch()
+
+    path = os.path.join(cache_dir,
+                        cache_key(sql, params, build, options) + '.parquet')
+    if os.path.exists(path):
+        os.utime(path)  # mark as recently used
+        return pd.read_parquet(path)
+
+    frame = fetch()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        frame.to_parquet(temp_path, index=False)
+    except (ImportError, ValueError, TypeError):
+        # No pyarrow, or a column Parquet can't hold. Just don't cache it.
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return frame
+    os.replace(temp_path, path)
+
+    evict(cache_dir, max_bytes)
+    return frame
@@ -0,0 +1,109 @@
+'''
+Persisted identifier crosswalk for district.db.
+
+The CCD files don't always carry an LEAID. The fiscal files have district
+NAMEs and Census CENSUSIDs, the directory files have ST_LEAIDs (state
+assigned ids), and other data (eg. the Utah accountability files) only has
+names or state ids. The leaid_crosswalk table keeps every
+(id_type, id_value, fipst) -> leaid pair seen in the directory and fiscal
+data along with the first and last year it was seen, so prep scripts and
+queries can resolve LEAIDs with an indexed join instead of recomputing the
+groupby repairs every run. Example query:
+
+    SELECT grades.*, leaid_crosswalk.leaid
+    FROM grades
+    INNER JOIN leaid_crosswalk
+        ON leaid_crosswalk.id_type = 'ST_LEAID'
+        AND leaid_crosswalk.fipst = 49
+        AND leaid_crosswalk.id_value = grades.st_leaid;
+
+id_values are normalized (see normalize_ids) before they go in the table, so
+normalize anything you look up the same way.
+'''
+
+import pandas as pd
+
+ID_TYPES = ['NAME', 'CENSUSID', 'ST_LEAID']
+
+def normalize_ids(values, id_type):
+    '''
+    Normalize identifiers so the same id matches across years.
+    - NAME: upper case, collapsed whitespace
+    - CENSUSID: stripped
+    - ST_LEAID: upper case and the 'XX-' state prefix CCD started adding in
+      2017 is removed (eg. 'UT-01' -> '01')
+    '''
+    values = values.astype('string').str.strip()
+
+    if id_type == 'NAME':
+        return values.str.upper().str.replace(r'\s+', ' ', regex=True)
+    if id_type == 'ST_LEAID':
+        return values.str.upper().str.replace(r'^[A-Z]{2}-', '', regex=True)
+    if id_type == 'CENSUSID':
+        return values
+
+    raise ValueError(f'id_type must be one of {ID_TYPES}, not {id_type}')
+
+def update_crosswalk(conn, frame, id_col, id_type, source,
+                     leaid_col='LEAID', fipst_col='FIPST',
+                     year_col='END_YEAR'):
+    '''
+    Add the (id, fipst, leaid) pairs in frame to leaid_crosswalk. Pairs that
+    are already in the table only get their first_year/last_year widened, so
+    running this again (or with a new year of data) is safe.
+    '''
+    pairs = pd.DataFrame({
+        'id_value': normalize_ids(frame[id_col], id_type),
+        'fipst': pd.to_numeric(frame[fipst_col], errors='coerce'),
+        'leaid': pd.to_numeric(frame[leaid_col], errors='coerce'),
+        'year': pd.to_numeric(frame[year_col], errors='coerce')
+    }).dropna()
+
+    pairs = (
+        pairs
+        .groupby(['id_value', 'fipst', 'leaid'])['year']
+        .agg(['min', 'max'])
+        .reset_index()
+    )
+
+    conn.executemany('''
+        INSERT INTO leaid_crosswalk
+            (id_type, id_value, fipst, leaid, first_year, last_year, source)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id_type, id_value, fipst, leaid) DO UPDATE SET
+            first_year = MIN(first_year, excluded.first_year),
+            last_year = MAX(last_year, excluded.last_year)
+        ;
+    ''', [(id_type, id_value, int(fipst), int(leaid), int(first), int(last),
+           source)
+          for id_value, fipst, leaid, first, last
+          in pairs.itertuples(index=False)])
+    conn.commit()
+
+def resolve_leaid(conn, values, id_type, fipst):
+    '''
+    Look up the LEAID for each id in values (a Series, with fipst a Series of
+    the same length). Returns an Int64 Series with the same index and NA
+    where the id isn't in the crosswalk. If an id has had more than one LEAID
+    the most recently seen one is used.
+    '''
+    # Only the rows for this id_type are read, using the primary key index.
+    crosswalk = pd.read_sql('''
+        SELECT id_value, fipst, leaid
+        FROM leaid_crosswalk
+        WHERE id_type = ?
+        ORDER BY last_year
+        ;
+    ''', conn, params=(id_type,))
+    crosswalk = (
+        crosswalk
+        .drop_duplicates(subset=['id_value', 'fipst'], keep='last')
+        .set_index(['id_value', 'fipst'])['leaid']
+    )
+
+    keys = pd.MultiIndex.from_arrays([
+        normalize_ids(values, id_type).astype(object),
+        pd.to_numeric(fipst, errors='coerce')
+    ])
+    return pd.Series(crosswalk.reindex(keys).to_numpy(),
+                     index=values.index, dtype='Int64')
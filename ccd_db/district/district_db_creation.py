@@ -6,11 +6,17 @@ This script creates a sqlite3 database that contains all the nonfiscal district
 level data from the CCD.
 
 Four tables:
-- membership
+- membership (plus the small *_cats category tables and membership_text view)
 - staff
 - directory
 - state
 
+plus leaid_crosswalk, which the directory and fiscal prep scripts fill in,
+the fiscal_* column-group tables (and fiscal view) and per_pupil.
+
+
+No indexes are made here. Run district_db_indexes.py after the prep scripts
+have loaded the data.
 '''
 
 # %%
@@ -0,0 +1,25 @@
+'''
+Creates the indexes in district_indexes.sql on data/district.db.
+
+Run this after district_db_creation.py and all the district_*_prep.py
+scripts (only district_db_optimize.py comes after it). The tables are
+loaded without indexes so every insert doesn't also have to update them,
+and sqlite builds each index here in one sorted pass.
+'''
+
+# %%
+
+import sqlite3
+
+conn = sqlite3.connect('data/district.db')
+cursor = conn.cursor()
+
+with open('district_indexes.sql', 'r', encoding="utf-8") as sql_file:
+    sql_script = sql_file.read()
+
+cursor.executescript(sql_script)
+conn.commit()
+
+conn.close()
+
+# %%
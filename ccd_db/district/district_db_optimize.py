@@ -0,0 +1,38 @@
+'''
+Compacts data/district.db once everything is loaded and indexed: bigger
+pages for the wide fiscal tables, fresh ANALYZE statistics and a VACUUM into
+a new file (see ccd_db/optimize.py). Prints the size and query time changes.
+
+Run this last, after district_db_indexes.py.
+'''
+
+# %%
+
+import sys
+
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.optimize import optimize_db
+
+# A few typical queries to time before and after.
+QUERIES = {
+    'membership, one year': '''
+        SELECT leaid, SUM(student_count)
+        FROM membership
+        WHERE end_year = 2020
+        GROUP BY leaid
+    ''',
+    'membership, one district': '''
+        SELECT end_year, student_count
+        FROM membership
+        WHERE leaid = 4900510
+    ''',
+    'fiscal, one year': '''
+        SELECT leaid, totalexp
+        FROM fiscal
+        WHERE end_year = 2020
+    '''
+}
+
+optimize_db('data/district.db', QUERIES)
+
+# %%
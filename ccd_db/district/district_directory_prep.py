@@ -8,10 +8,21 @@ and earlier)
 '''
 #%%
 
-import sqlite3
+import sys
 import pandas as pd
 
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.crosswalk import update_crosswalk
+from ccd_db.jurisdictions import load_jurisdictions
+from ccd_db.bulk_load import (connect, replace_partitions, replace_table,
+                              select_years)
+
 PRE_PATH = "data/nonfiscal/directory/directory_"
+
+# Years to (re)load into the database, eg. [2024] when a new CCD release comes
+# out. None loads every year. Years that aren't loaded are left alone.
+LOAD_YEARS = None
+
 files = {year: [f'{PRE_PATH}{year}.csv', '', ',', {}]
          for year in range(2023, 2014, -1)}
 
@@ -91,24 +102,8 @@ directory = (directory
 
 # Concat with 2014 and earlier data
 directory = pd.concat([directory,
-                       pd.read_csv("data/nonfiscal/directory/" + \
-                           "directory_through_2014.csv",
-                           dtype={'UNION': 'category',
-                                  'FIPST': int,
-                                  'MSTREET1': str,
-                                  'MZIP': str,
-                                  'MZIP4': str,
-                                  'LSTREET1': str,
-                                  'LCITY': str,
-                                  'LSTATE': str,
-                                  'LZIP': str,
-                                  'LZIP4': str,
-                                  'PHONE': str,
-                                  'CHARTER_LEA': 'category',
-                                  'OPERATIONAL_SCHOOLS': 'Int64',
-                                  'AGCHRT': 'category'
-                                  },
-                           na_values={'OPERATIONAL_SCHOOLS': ['N']})],
+                       pd.read_parquet("data/nonfiscal/directory/" + \
+                           "directory_through_2014.parquet")],
                       ignore_index=True)
 
 def bool_mapper(value):
@@ -159,79 +154,21 @@ directory = directory.rename(columns = {'UNION': 'UNION_CODE',
 directory_columns = [x for x in directory.columns
                      if x not in ['STATENAME', 'ST']]
 
-col_dtypes = {
-    'end_year': 'INTEGER',
-    'fipst': 'INTEGER',
-    'lea_name': 'TEXT',
-    'state_agency_no': 'INTEGER',
-    'union_code': 'TEXT',
-    'st_leaid': 'TEXT',
-    'leaid': 'INTEGER',
-    'mstreet1': 'TEXT',
-    'mstreet2': 'TEXT',
-    'mstreet3': 'TEXT',
-    'mcity': 'TEXT',
-    'mstate': 'TEXT',
-    'mzip': 'TEXT',
-    'mzip4': 'TEXT',
-    'lstreet1': 'TEXT',
-    'lstreet2': 'TEXT',
-    'lstreet3': 'TEXT',
-    'lcity': 'TEXT',
-    'lstate': 'TEXT',
-    'lzip': 'TEXT',
-    'lzip4': 'TEXT',
-    'phone': 'TEXT',
-    'website': 'TEXT',
-    'sy_status': 'INTEGER',
-    'sy_status_text': 'TEXT',
-    'updated_status': 'INTEGER',
-    'updated_status_text': 'TEXT',
-    'effective_date': 'TEXT',
-    'lea_type': 'INTEGER',
-    'lea_type_text': 'TEXT',
-    'out_of_state_flag': 'INTEGER',
-    'charter_lea': 'TEXT',
-    'charter_lea_text': 'TEXT',
-    'nogrades': 'INTEGER',
-    'g_pk_offered': 'INTEGER',
-    'g_kg_offered': 'INTEGER',
-    'g_1_offered': 'INTEGER',
-    'g_2_offered': 'INTEGER',
-    'g_3_offered': 'INTEGER',
-    'g_4_offered': 'INTEGER',
-    'g_5_offered': 'INTEGER',
-    'g_6_offered': 'INTEGER',
-    'g_7_offered': 'INTEGER',
-    'g_8_offered': 'INTEGER',
-    'g_9_offered': 'INTEGER',
-    'g_10_offered': 'INTEGER',
-    'g_11_offered': 'INTEGER',
-    'g_12_offered': 'INTEGER',
-    'g_13_offered': 'INTEGER',
-    'g_ug_offered': 'INTEGER',
-    'g_ae_offered': 'INTEGER',
-    'gslo': 'TEXT',
-    'gshi': 'TEXT',
-    'level': 'TEXT',
-    'igoffered': 'TEXT',
-    'operational_schools': 'INTEGER',
-    'biea': 'INTEGER',
-    'agchrt': 'TEXT'}
-
 # Creates a new database file if it doesn't exist
-conn = sqlite3.connect('data/district.db')
+conn = connect('data/district.db')
 cursor = conn.cursor()
 
-(directory[directory_columns]
- .rename(dict(zip(directory.columns, directory.columns.str.lower())))
- .to_sql('directory',
-         con=conn,
-         if_exists='append',
-         index=False,
-         dtype=col_dtypes)
+replace_partitions(
+    conn,
+    {'directory': select_years(
+        directory[directory_columns].rename(columns=str.lower), LOAD_YEARS)},
+    'district_directory_prep.py'
 )
 
+# Remember which names and state ids went with which LEAIDs.
+update_crosswalk(conn, directory, 'LEA_NAME', 'NAME', 'directory')
+update_crosswalk(conn, directory, 'ST_LEAID', 'ST_LEAID', 'directory')
+
 conn.close()
 
 # %%
@@ -244,24 +181,18 @@ conn.close()
 # Columns that are in the database directory table
 directory_state_columns = ['FIPST', 'ST', 'STATENAME']
 
-col_dtypes = {
-    'fipst': 'INTEGER',
-    'st': 'TEXT',
-    'statename': 'TEXT'
-}
-
 # Creates a new database file if it doesn't exist
-conn = sqlite3.connect('district.db')
+conn = connect('data/district.db')
 cursor = conn.cursor()
 
-(directory[directory_state_columns].drop_duplicates(subset='FIPST')
- .rename(dict(zip(directory.columns, directory.columns.str.lower())))
- .to_sql('state',
-         con=conn,
-         if_exists='append',
-         index=False,
-         dtype=col_dtypes)
-)
+replace_table(conn,
+              (directory[directory_state_columns]
+               .drop_duplicates(subset='FIPST')
+               .rename(columns=str.lower)),
+              'state')
+
+# FIPS codes, abbreviations and names for the states and territories.
+load_jurisdictions(conn)
 
 conn.close()
 
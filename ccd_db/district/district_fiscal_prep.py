@@ -5,12 +5,21 @@ Jan 1, 2025
 Script to organize fiscal data from district level CCD datasets.
 '''
 #%%
-import sqlite3
+import sys
 from io import StringIO
 import pandas as pd
 
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.crosswalk import update_crosswalk, resolve_leaid
+from ccd_db.sentinels import mask_negative_sentinels
+from ccd_db.bulk_load import connect, replace_partitions, select_years
+
 PRE_PATH = "data/fiscal/fiscal_"
 
+# Years to (re)load into the database, eg. [2024] when a new CCD release comes
+# out. None loads every year. Years that aren't loaded are left alone.
+LOAD_YEARS = None
+
 base_cats = {'CENSUSID': 'category',
              'CONUM': 'string',
              'GSHI': 'category',
@@ -61,38 +70,63 @@ fiscal = (pd.
 fiscal['NAME'] = fiscal['NAME'].str.upper()
 fiscal['LEAID'] = fiscal['LEAID'].replace({'M': pd.NA})
 
-fiscal['LEAID'] = (
-    fiscal
-    .groupby('NAME')['LEAID']
-    .transform(lambda x: x.ffill().bfill())
-)
+# Which rows had an LEAID in the file itself (before any filling in below),
+# so those win when filling in gives two rows the same LEAID.
+leaid_from_file = fiscal['LEAID'].notna()
+
+def backfill_leaid(frame):
+    '''
+    Fill in missing LEAIDs from other years of the same district NAME, then
+    from other rows with the same CENSUSID, then from NAME once more.
+
+    Uses the groupby ffill/bfill primitives and one Series.map so there are
+    no Python calls per district name. Gives the same LEAIDs as the old
+    groupby('NAME').transform(lambda x: x.ffill().bfill()) version.
+    '''
+    def fill_by_name(leaid):
+        return (
+            leaid
+            .groupby(frame['NAME']).ffill()
+            .groupby(frame['NAME']).bfill()
+        )
 
-# I'm nervous about non-unique CENSUSID values to use the above method
-# chain to fill in things. But not so nervous that I won't use it
-# to fill in already missing values.
-spare_id = fiscal.loc[fiscal['LEAID'].isna(), 'CENSUSID']
+    leaid = fill_by_name(frame['LEAID'])
+
+    # I'm nervous about non-unique CENSUSID values to use the above method
+    # chain to fill in things. But not so nervous that I won't use it
+    # to fill in already missing values. When a CENSUSID has more than one
+    # LEAID the last one seen wins (like building a dict would).
+    census_to_leaid = (
+        pd.DataFrame({'LEAID': leaid, 'CENSUSID': frame['CENSUSID']})
+        .dropna()
+        .drop_duplicates()
+        .drop_duplicates(subset='CENSUSID', keep='last')
+        .set_index('CENSUSID')['LEAID']
+    )
+    leaid = leaid.fillna(
+        frame['CENSUSID'].map(census_to_leaid).astype(object)
+    )
+
+    # Use the names again to fill in any more holes.
+    return fill_by_name(leaid)
+
+# Save the NAME/CENSUSID pairs that came with an LEAID in the files, then
+# fill in what we can from the crosswalk (which also has the directory names,
+# and is matched within state) before guessing with backfill_leaid.
+conn = connect('data/district.db')
+
+update_crosswalk(conn, fiscal, 'CENSUSID', 'CENSUSID', 'fiscal')
+update_crosswalk(conn, fiscal, 'NAME', 'NAME', 'fiscal')
+
+for id_col, id_type in [('CENSUSID', 'CENSUSID'), ('NAME', 'NAME')]:
+    resolved = resolve_leaid(conn, fiscal[id_col], id_type, fiscal['FIPST'])
+    fiscal['LEAID'] = fiscal['LEAID'].fillna(
+        resolved.astype('string').str.zfill(7).astype(object)
+    )
 
-fdsa = (
-    fiscal
-    .loc[fiscal['CENSUSID'].isin(spare_id), ['LEAID', 'CENSUSID']]
-    .dropna()
-    .drop_duplicates()
-)
+conn.close()
 
-fiscal['LEAID'] = (
-    fiscal['LEAID']
-    .fillna(
-        fiscal['CENSUSID']
-        .map(fdsa.set_index('CENSUSID')['LEAID'].to_dict())
-        )
-)
-
-# Use this again to fill in any more holes.
-fiscal['LEAID'] = (
-    fiscal
-    .groupby('NAME')['LEAID']
-    .transform(lambda x: x.ffill().bfill())
-)
+fiscal['LEAID'] = backfill_leaid(fiscal)
 
 # After the above filling in of LEAID, for each year, less that 1% of LEAID
 # entries are NA and less than 0.1% of LEAIDs are NA. So we're just gonna
@@ -140,11 +174,7 @@ fiscal = (
 )
 
 # Replace negative numbers with NA
-fiscal[fiscal.select_dtypes(include='number').columns] = (
-    fiscal[fiscal.select_dtypes(include='number').columns]
-    .select_dtypes(include='number')
-    .where(fiscal[fiscal.select_dtypes(include='number').columns] >= 0, pd.NA)
-)
+mask_negative_sentinels(fiscal)
 
 # %%
 ###############################################################################
@@ -155,37 +185,81 @@ fiscal[fiscal.select_dtypes(include='number').columns] = (
 # SQL keywords.
 fiscal = fiscal.rename(columns = {'NAME': 'DISTRICT_NAME',
                                   'WEIGHT': 'DISTRICT_WEIGHT'})
-
-# Create the correct sqlite3 datatype mapping for columns
-cat_cols = fiscal.dtypes.loc[fiscal.dtypes == 'category']
-object_cols = fiscal.dtypes.loc[fiscal.dtypes == 'object']
-int64_cols = fiscal.dtypes.loc[fiscal.dtypes == 'Int64']
-float_cols = fiscal.dtypes.loc[fiscal.dtypes == float]
-
-col_dtypes = {
-    **{col: 'TEXT' for col in cat_cols.index},
-    **{col: 'TEXT' for col in object_cols.index},
-    **{col: 'INTEGER' for col in int64_cols.index},
-    **{col: 'REAL' for col in float_cols.index}
-}
+fiscal.columns = fiscal.columns.str.lower()
 
 # I'm dropping the non_numeric leaid rows just for the sake of making the db
 # faster
-fiscal['LEAID'] = pd.to_numeric(fiscal['LEAID'], errors='coerce')
-fiscal = fiscal.dropna(axis=0, subset='LEAID').astype({'LEAID': int})
+fiscal['leaid'] = pd.to_numeric(fiscal['leaid'], errors='coerce')
+fiscal = fiscal.dropna(axis=0, subset='leaid').astype({'leaid': int})
+
+# The fiscal tables are keyed on (end_year, leaid). Filling LEAIDs in by name
+# can give two rows in a year the same LEAID (eg. a same-named district in
+# another state), so keep the row whose LEAID came from the file, and
+# otherwise the first one.
+KEY_COLS = ['end_year', 'leaid']
+file_first = (
+    leaid_from_file[fiscal.index]
+    .sort_values(ascending=False, kind='stable')
+    .index
+)
+repeats = fiscal.loc[file_first].duplicated(subset=KEY_COLS)
+print(f'Dropping {repeats.sum()} rows with a repeated (end_year, leaid)')
+fiscal = fiscal.drop(index=repeats.index[repeats])
+
+#%%
+###############################################################################
+# Split the columns into groups. Each group is its own table so queries that
+# only need a few variables don't read all ~390 columns. The fiscal view in
+# district_schema.sql puts them back together.
+###############################################################################
+
+DISTRICT_COLS = ['censusid', 'district_name', 'csa', 'cbsa', 'pid6',
+                 'unit_type', 'fipst', 'v33', 'district_weight', 'ccdnf',
+                 'fipsco', 'cenfile', 'membersch']
+
+REVENUE_COLS = [
+    'totalrev', 'tfedrev', 'c25', 'c26', 'b26', 'tstrev', 'c23', 'c27',
+    'tlocrev', 't02', 't06', 't09', 't15', 't40', 't99', 'd11', 'd23', 'a09',
+    'a10', 'u22', 'u97', 'a12', 'c24', 'c14', 'c15', 'c16', 'c17', 'c18',
+    'c19', 'c20', 'c36', 'b10', 'b11', 'b12', 'b13', 'c01', 'c05', 'c12',
+    'c04', 'c06', 'c09', 'c11', 'c07', 'c08', 'c10', 'c13', 'c38', 'c39',
+    'c35', 'a07', 'a08', 'a11', 'a13', 'a20', 'a15', 'a40', 'u11', 'u30',
+    'u50', 'c22', 'b14', 'ar1', 'ar2', 'ar3', 'ar4', 'ar5', 'ar6', 'ar1a',
+    'ar1b', 'ar2a', 'ar6a']
+
+# Long and short term debt, and cash and securities.
+DEBT_COLS = ['_19h', '_21f', '_31f', '_41f', '_61v', '_66v',
+             'w01', 'w31', 'w61']
+
+FLAG_COLS = [col for col in fiscal.columns if col.startswith('fl_')]
+
+# Expenditures and whatever else is left over.
+EXPENDITURE_COLS = [
+    col for col in fiscal.columns
+    if col not in KEY_COLS + DISTRICT_COLS + REVENUE_COLS + DEBT_COLS +
+    FLAG_COLS
+]
+
+column_groups = {'fiscal_district': DISTRICT_COLS,
+                 'fiscal_revenue': REVENUE_COLS,
+                 'fiscal_expenditure': EXPENDITURE_COLS,
+                 'fiscal_debt': DEBT_COLS,
+                 'fiscal_flags': FLAG_COLS}
 
 #%%
 # Creates a new database file if it doesn't exist
-conn = sqlite3.connect('data/district.db')
+conn = connect('data/district.db')
 cursor = conn.cursor()
 
-(fiscal
- .rename(dict(zip(fiscal.columns, fiscal.columns.str.lower())))
- .to_sql('fiscal',
-         con=conn,
-         if_exists='append',
-         index=False,
-         dtype=col_dtypes)
+fiscal = select_years(fiscal, LOAD_YEARS)
+
+# All five tables go in together so they always have the same years.
+replace_partitions(
+    conn,
+    {table: fiscal[KEY_COLS + [col for col in columns
+                               if col in fiscal.columns]]
+     for table, columns in column_groups.items()},
+    'district_fiscal_prep.py'
 )
 
 conn.close()
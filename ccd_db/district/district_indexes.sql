@@ -0,0 +1,11 @@
+/*
+Indexes for district.db. Run by district_db_indexes.py after all the tables
+are loaded (building an index over a full table is a lot faster than keeping
+it up to date through millions of inserts).
+*/
+
+-- Indexes to speed up common queries
+CREATE INDEX IF NOT EXISTS idx_membership_end_year_leaid
+    ON membership (end_year, leaid);
+CREATE INDEX IF NOT EXISTS idx_leaid_crosswalk_leaid
+    ON leaid_crosswalk (leaid);
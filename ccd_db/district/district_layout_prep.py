@@ -205,7 +205,7 @@ layouts = (
     .drop(columns=['width'])
 )
 
-layouts.to_csv('data/nonfisal/whole/layouts.csv', index=False)
+layouts.to_csv('data/nonfiscal/whole/layouts.csv', index=False)
 
 # Could use something like this to get the fields we want:
 # layouts[~layouts['description'].str.contains('DROPOUT') \
@@ -52,11 +52,21 @@ use the combos.
 '''
 
 # %%
+import sys
 import sqlite3
 import pandas as pd
 import numpy as np # just for a few np.where uses
 
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.bulk_load import (connect, build_transaction, swap_partitions,
+                              select_years)
+
 PRE_PATH = "data/nonfiscal/membership/membership_"
+
+# Years to (re)load into the database, eg. [2024] when a new CCD release comes
+# out. None loads every year. Years that aren't loaded are left alone.
+LOAD_YEARS = None
+
 files = {year: [f'{PRE_PATH}{year}.csv', '', ',', {}]
          for year in range(2015, 2024)}
 
@@ -79,14 +89,8 @@ pre_membership = {year: pd.read_csv(file,
                   year, (file, format, delim, kind) in files.items()}
 
 # add files/years from 1987 to 2014
-membership_2014 = pd.read_csv('data/nonfiscal/membership/' + \
-                              'membership_through_2014.csv',
-                              dtype={'ST_LEAID': 'string',
-                                     'UG': 'Int64',
-                                     'MEMBER': 'Int64',
-                                     'IAMEMPUP': 'category'},
-                              na_values={'UG':['N', 'M'],
-                                         'MEMBER': ['N', 'M']})
+membership_2014 = pd.read_parquet('data/nonfiscal/membership/' + \
+                                  'membership_through_2014.parquet')
 
 pre_membership.update({x: membership_2014.loc[membership_2014['END_YEAR'] == x,
                                               :].copy()
@@ -327,33 +331,82 @@ membership = (pd.
 # Write the membership table to the database
 ############################################################################
 
+# The category columns are written as integer ids into the small *_cats
+# tables (see district_schema.sql) instead of repeating the text on every row.
+# The membership_text view in the database has the old text columns.
+
+def encode_categories(labels, column, connection):
+    '''
+    Add any new labels to the column_cats table and return the integer ids
+    for the labels. Only the categories are looked up, not every row.
+    '''
+    labels = labels.astype('category')
+    connection.executemany(
+        f'INSERT OR IGNORE INTO {column}_cats ({column}) VALUES (?)',
+        [(label,) for label in labels.cat.categories]
+    )
+    label_ids = dict(connection.execute(
+        f'SELECT {column}, {column}_id FROM {column}_cats'
+    ).fetchall())
+    category_ids = np.array([label_ids[label]
+                             for label in labels.cat.categories] + [0],
+                            dtype='int64')
+
+    # Code -1 (missing label) picks the trailing 0 and is masked out.
+    codes = labels.cat.codes.to_numpy()
+    return pd.arrays.IntegerArray(category_ids[codes], codes < 0)
+
 # columns that are in the database table membership
-membership_columns = ['END_YEAR', 'LEAID', 'STUDENT_COUNT',
-                      'RACE_ETHNICITY', 'GRADE', 'SEX', 'TOTAL_INDICATOR',
-                      'DMS_FLAG']
-
-col_dtypes = {
-    'end_year': 'INTEGER',
-    'leaid': 'INTEGER',
-    'student_count': 'INTEGER',
-    'race_ethnicity': 'TEXT',
-    'grade': 'TEXT',
-    'sex': 'TEXT',
-    'total_indicator': 'TEXT',
-    'dms_flag': 'TEXT'}
+membership_columns = ['END_YEAR', 'LEAID', 'STUDENT_COUNT']
 
 # Creates a new database file if it doesn't exist
-conn = sqlite3.connect('data/district.db')
-cursor = conn.cursor()
+conn = connect('data/district.db')
 
-(membership[membership_columns]
- .rename(dict(zip(membership.columns, membership.columns.str.lower())))
- .to_sql('membership',
-         con=conn,
-         if_exists='append',
-         index=False,
-         dtype=col_dtypes)
-)
+membership = select_years(membership, LOAD_YEARS, 'END_YEAR')
+membership_ids = membership[membership_columns].rename(columns=str.lower)
+for col in cat_cols:
+    membership_ids[col.lower() + '_id'] = (
+        encode_categories(membership[col], col.lower(), conn)
+    )
+conn.commit()
+
+# Swap in the new years of membership and materialize the total enrollment
+# for each (end_year, leaid) from them. Pretty much every query against
+# membership only wants one of these two numbers. Only the years that were
+# just loaded are redone, in the same transaction as the membership rows so
+# the two never disagree if something fails.
+loaded_years = ', '.join(str(year) for year in
+                         membership_ids['end_year'].unique())
+with build_transaction(conn):
+    swap_partitions(conn, {'membership': membership_ids},
+                    'district_member_prep.py')
+    conn.execute(
+        f'DELETE FROM enrollment_totals WHERE end_year IN ({loaded_years})'
+    )
+    conn.execute(f'''
+        INSERT INTO enrollment_totals
+        SELECT
+            membership.end_year,
+            membership.leaid,
+            SUM(CASE WHEN total_indicator = 'Education Unit Total'
+                THEN student_count END) AS total,
+            SUM(CASE WHEN total_indicator =
+                         'Derived - Education Unit Total ' ||
+                         'minus Adult Education Count'
+                THEN student_count END) AS total_less_ae
+        FROM
+            membership
+        INNER JOIN
+            total_indicator_cats USING (total_indicator_id)
+        WHERE
+            membership.end_year IN ({loaded_years})
+            AND total_indicator IN ('Education Unit Total',
+                                    'Derived - Education Unit Total minus ' ||
+                                    'Adult Education Count')
+        GROUP BY
+            membership.end_year, membership.leaid
+        ;
+    ''')
 
 conn.close()
 
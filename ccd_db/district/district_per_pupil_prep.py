@@ -0,0 +1,52 @@
+'''
+Fills the per_pupil table in data/district.db: current, instruction and
+total expenditure per student each year, nominal and adjusted for inflation
+(see ccd_db/per_pupil.py).
+
+Run after district_fiscal_prep.py and district_member_prep.py (which fills
+enrollment_totals).
+
+Current is tcurelsc (current spending on elementary/secondary education),
+instruction is tcurinst and total is totalexp (which includes capital
+outlay and the rest).
+'''
+#%%
+import sys
+import pandas as pd
+
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.bulk_load import connect, replace_partitions
+from ccd_db.inflation import load_cpi
+from ccd_db.per_pupil import per_pupil_table
+
+MEASURES = {'current': 'tcurelsc', 'instruction': 'tcurinst',
+            'total': 'totalexp'}
+
+conn = connect('data/district.db')
+
+# The CPI-U series the *_real columns use, for adjusting anything else in SQL.
+load_cpi(conn)
+
+spending = pd.read_sql('''
+    SELECT
+        fiscal_expenditure.end_year,
+        fiscal_expenditure.leaid,
+        enrollment_totals.total_less_ae AS enrollment,
+        fiscal_expenditure.tcurelsc,
+        fiscal_expenditure.tcurinst,
+        fiscal_expenditure.totalexp
+    FROM
+        fiscal_expenditure
+    INNER JOIN
+        enrollment_totals
+        ON fiscal_expenditure.end_year = enrollment_totals.end_year
+        AND fiscal_expenditure.leaid = enrollment_totals.leaid
+''', conn)
+
+replace_partitions(conn,
+                   {'per_pupil': per_pupil_table(spending, 'leaid', MEASURES)},
+                   'district_per_pupil_prep.py')
+
+conn.close()
+
+# %%
@@ -10,6 +10,15 @@ Schema for nonfiscal, district level CCD data. Includes 4 tables:
 - directory (could be retitled 'lea')
 - state (basically directory for state)
 
+Fiscal (F-33) data is in fiscal_district, fiscal_revenue, fiscal_expenditure,
+fiscal_debt and fiscal_flags, with a fiscal view of the whole row.
+
+The leaid_crosswalk table maps district names, CENSUSIDs and ST_LEAIDs to
+LEAIDs across years.
+
+Membership only stores integer ids for its category columns. The labels are
+in the *_cats tables and the membership_text view puts them back together.
+
 I guess you should df.to_sql() the dataframe info into each table. There
 is a dtype parameter that should be used with each column either INTEGER, REAL,
 or TEXT.
@@ -121,24 +130,341 @@ CREATE TABLE staff (
     stusup REAL
 );
 
+-- Category (dimension) tables for membership. The labels repeat on every
+-- one of the tens of millions of membership rows so they're stored once here
+-- and membership just holds the integer ids.
+CREATE TABLE race_ethnicity_cats (
+    race_ethnicity_id INTEGER PRIMARY KEY,
+    race_ethnicity TEXT UNIQUE
+);
+
+CREATE TABLE grade_cats (
+    grade_id INTEGER PRIMARY KEY,
+    grade TEXT UNIQUE
+);
+
+CREATE TABLE sex_cats (
+    sex_id INTEGER PRIMARY KEY,
+    sex TEXT UNIQUE
+);
+
+CREATE TABLE total_indicator_cats (
+    total_indicator_id INTEGER PRIMARY KEY,
+    total_indicator TEXT UNIQUE
+);
+
+CREATE TABLE dms_flag_cats (
+    dms_flag_id INTEGER PRIMARY KEY,
+    dms_flag TEXT UNIQUE
+);
+
 -- Student enrollment information
 CREATE TABLE membership (
     id INTEGER PRIMARY KEY,
     end_year INTEGER,
     leaid INTEGER,
     student_count INTEGER,
-    race_ethnicity TEXT,
-    grade TEXT,
-    sex TEXT,
-    total_indicator TEXT,
-    dms_flag TEXT
+    race_ethnicity_id INTEGER REFERENCES race_ethnicity_cats (race_ethnicity_id),
+    grade_id INTEGER REFERENCES grade_cats (grade_id),
+    sex_id INTEGER REFERENCES sex_cats (sex_id),
+    total_indicator_id INTEGER
+        REFERENCES total_indicator_cats (total_indicator_id),
+    dms_flag_id INTEGER REFERENCES dms_flag_cats (dms_flag_id)
 );
 
--- Fiscal information
-CREATE TABLE fiscal (
-    id INTEGER PRIMARY KEY,
+-- Membership with the text labels joined back in. Same columns as the old
+-- all TEXT membership table so old queries only need the table name changed.
+CREATE VIEW membership_text AS
+SELECT
+    membership.id,
+    membership.end_year,
+    membership.leaid,
+    membership.student_count,
+    race_ethnicity_cats.race_ethnicity,
+    grade_cats.grade,
+    sex_cats.sex,
+    total_indicator_cats.total_indicator,
+    dms_flag_cats.dms_flag
+FROM membership
+LEFT JOIN race_ethnicity_cats USING (race_ethnicity_id)
+LEFT JOIN grade_cats USING (grade_id)
+LEFT JOIN sex_cats USING (sex_id)
+LEFT JOIN total_indicator_cats USING (total_indicator_id)
+LEFT JOIN dms_flag_cats USING (dms_flag_id);
+
+-- Total enrollment per LEA and year, with and without adult education.
+-- Materialized from membership by district_member_prep.py so the usual
+-- totals lookup is a primary key read instead of a membership scan.
+CREATE TABLE enrollment_totals (
+    end_year INTEGER,
+    leaid INTEGER,
+    total INTEGER,
+    total_less_ae INTEGER,
+    PRIMARY KEY (end_year, leaid)
+);
+
+-- Identifier crosswalk. Every (NAME | CENSUSID | ST_LEAID, fipst) -> leaid
+-- pair seen in the directory and fiscal files with the years it was seen.
+-- Filled by ccd_db/crosswalk.py from district_directory_prep.py and
+-- district_fiscal_prep.py. id_value is normalized (see crosswalk.py).
+CREATE TABLE leaid_crosswalk (
+    id_type TEXT,
+    id_value TEXT,
+    fipst INTEGER,
+    leaid INTEGER,
+    first_year INTEGER,
+    last_year INTEGER,
+    source TEXT,
+    PRIMARY KEY (id_type, id_value, fipst, leaid)
+);
+
+-- Fiscal information. The ~390 F-33 columns are split into column-group
+-- tables keyed by (end_year, leaid) so a query only reads the pages for the
+-- groups it uses. The fiscal view puts the full row back together (it still
+-- has to probe every group's key, so query the group tables directly when
+-- you can).
+-- The column lists for each group are in district_fiscal_prep.py.
+CREATE TABLE fiscal_district (
+    end_year INTEGER,
     leaid INTEGER,
     censusid TEXT,
+    district_name TEXT,
+    csa TEXT,
+    cbsa TEXT,
+    pid6 TEXT,
+    unit_type TEXT,
+    fipst INTEGER,
+    v33 INTEGER,
+    district_weight INTEGER,
+    ccdnf INTEGER,
+    fipsco INTEGER,
+    cenfile INTEGER,
+    membersch INTEGER,
+    PRIMARY KEY (end_year, leaid)
+);
+
+CREATE TABLE fiscal_revenue (
+    end_year INTEGER,
+    leaid INTEGER,
+    totalrev INTEGER,
+    tfedrev INTEGER,
+    c25 INTEGER,
+    c26 INTEGER,
+    b26 INTEGER,
+    tstrev INTEGER,
+    c23 INTEGER,
+    c27 INTEGER,
+    tlocrev INTEGER,
+    t02 INTEGER,
+    t06 INTEGER,
+    t09 INTEGER,
+    t15 INTEGER,
+    t40 INTEGER,
+    t99 INTEGER,
+    d11 INTEGER,
+    d23 INTEGER,
+    a09 INTEGER,
+    a10 INTEGER,
+    u22 INTEGER,
+    u97 INTEGER,
+    a12 INTEGER,
+    c24 INTEGER,
+    c14 INTEGER,
+    c15 INTEGER,
+    c16 INTEGER,
+    c17 INTEGER,
+    c18 INTEGER,
+    c19 INTEGER,
+    c20 INTEGER,
+    c36 INTEGER,
+    b10 INTEGER,
+    b11 INTEGER,
+    b12 INTEGER,
+    b13 INTEGER,
+    c01 INTEGER,
+    c05 INTEGER,
+    c12 INTEGER,
+    c04 INTEGER,
+    c06 INTEGER,
+    c09 INTEGER,
+    c11 INTEGER,
+    c07 INTEGER,
+    c08 INTEGER,
+    c10 INTEGER,
+    c13 INTEGER,
+    c38 INTEGER,
+    c39 INTEGER,
+    c35 INTEGER,
+    a07 INTEGER,
+    a08 INTEGER,
+    a11 INTEGER,
+    a13 INTEGER,
+    a20 INTEGER,
+    a15 INTEGER,
+    a40 INTEGER,
+    u11 INTEGER,
+    u30 INTEGER,
+    u50 INTEGER,
+    c22 INTEGER,
+    b14 INTEGER,
+    ar1 INTEGER,
+    ar2 INTEGER,
+    ar3 INTEGER,
+    ar4 INTEGER,
+    ar5 INTEGER,
+    ar6 INTEGER,
+    ar1a INTEGER,
+    ar1b INTEGER,
+    ar2a INTEGER,
+    ar6a INTEGER,
+    PRIMARY KEY (end_year, leaid)
+);
+
+CREATE TABLE fiscal_expenditure (
+    end_year INTEGER,
+    leaid INTEGER,
+    totalexp INTEGER,
+    tcurinst INTEGER,
+    e13 INTEGER,
+    tcurssvc INTEGER,
+    e17 INTEGER,
+    e07 INTEGER,
+    e08 INTEGER,
+    e09 INTEGER,
+    e15 INTEGER,
+    e27 INTEGER,
+    tcuroth INTEGER,
+    e11 INTEGER,
+    e10a INTEGER,
+    tnonelse INTEGER,
+    j10 INTEGER,
+    j11 INTEGER,
+    e10b INTEGER,
+    j12 INTEGER,
+    j13 INTEGER,
+    j15 INTEGER,
+    tcapout INTEGER,
+    f12 INTEGER,
+    k12 INTEGER,
+    g15 INTEGER,
+    tcurelsc INTEGER,
+    l12 INTEGER,
+    m12 INTEGER,
+    q11 INTEGER,
+    i86 INTEGER,
+    z32 INTEGER,
+    z33 INTEGER,
+    v35 INTEGER,
+    v40 INTEGER,
+    v45 INTEGER,
+    v50 INTEGER,
+    v55 INTEGER,
+    v85 INTEGER,
+    v60 INTEGER,
+    v65 INTEGER,
+    v70 INTEGER,
+    v75 INTEGER,
+    v80 INTEGER,
+    k09 INTEGER,
+    k10 INTEGER,
+    k11 INTEGER,
+    v11 INTEGER,
+    v13 INTEGER,
+    v15 INTEGER,
+    v17 INTEGER,
+    v19 INTEGER,
+    v21 INTEGER,
+    v23 INTEGER,
+    v25 INTEGER,
+    v27 INTEGER,
+    v29 INTEGER,
+    z34 INTEGER,
+    v10 INTEGER,
+    v30 INTEGER,
+    v32 INTEGER,
+    v91 INTEGER,
+    v92 INTEGER,
+    v90 INTEGER,
+    v37 INTEGER,
+    v38 INTEGER,
+    z35 INTEGER,
+    z36 INTEGER,
+    z37 INTEGER,
+    z38 INTEGER,
+    v93 INTEGER,
+    hr1 INTEGER,
+    he1 INTEGER,
+    he2 INTEGER,
+    v95 INTEGER,
+    v02 INTEGER,
+    k14 INTEGER,
+    ce1 INTEGER,
+    ce2 INTEGER,
+    ce3 INTEGER,
+    se1 INTEGER,
+    se2 INTEGER,
+    se3 INTEGER,
+    se4 INTEGER,
+    se5 INTEGER,
+    ae1 INTEGER,
+    ae2 INTEGER,
+    ae3 INTEGER,
+    ae4 INTEGER,
+    ae5 INTEGER,
+    ae6 INTEGER,
+    ae7 INTEGER,
+    ae8 INTEGER,
+    ae1a INTEGER,
+    ae1b INTEGER,
+    ae1c INTEGER,
+    ae1d INTEGER,
+    ae1e INTEGER,
+    ae1f INTEGER,
+    ae1g INTEGER,
+    ae2a INTEGER,
+    ae2b INTEGER,
+    ae2c INTEGER,
+    ae2d INTEGER,
+    ae2e INTEGER,
+    ae2f INTEGER,
+    ae2g INTEGER,
+    ae4a INTEGER,
+    ae4b INTEGER,
+    ae4c INTEGER,
+    ae4d INTEGER,
+    ae4e INTEGER,
+    ae4f INTEGER,
+    ae4g INTEGER,
+    v12 REAL,
+    v14 REAL,
+    v16 REAL,
+    v18 REAL,
+    v20 REAL,
+    v22 REAL,
+    v24 REAL,
+    v26 REAL,
+    v28 REAL,
+    PRIMARY KEY (end_year, leaid)
+);
+
+CREATE TABLE fiscal_debt (
+    end_year INTEGER,
+    leaid INTEGER,
+    _19h INTEGER,
+    _21f INTEGER,
+    _31f INTEGER,
+    _41f INTEGER,
+    _61v INTEGER,
+    _66v INTEGER,
+    w01 INTEGER,
+    w31 INTEGER,
+    w61 INTEGER,
+    PRIMARY KEY (end_year, leaid)
+);
+
+CREATE TABLE fiscal_flags (
+    end_year INTEGER,
+    leaid INTEGER,
     fl_v33 TEXT,
     fl_c14 TEXT,
     fl_c15 TEXT,
@@ -309,223 +635,460 @@ CREATE TABLE fiscal (
     fl_ae4e TEXT,
     fl_ae4f TEXT,
     fl_ae4g TEXT,
-    district_name TEXT,
-    csa TEXT,
-    cbsa TEXT,
-    pid6 TEXT,
-    unit_type TEXT,
+    PRIMARY KEY (end_year, leaid)
+);
+
+CREATE VIEW fiscal AS
+SELECT
+    d.end_year,
+    d.leaid,
+    d.censusid,
+    d.district_name,
+    d.csa,
+    d.cbsa,
+    d.pid6,
+    d.unit_type,
+    d.fipst,
+    d.v33,
+    d.district_weight,
+    d.ccdnf,
+    d.fipsco,
+    d.cenfile,
+    d.membersch,
+    r.totalrev,
+    r.tfedrev,
+    r.c25,
+    r.c26,
+    r.b26,
+    r.tstrev,
+    r.c23,
+    r.c27,
+    r.tlocrev,
+    r.t02,
+    r.t06,
+    r.t09,
+    r.t15,
+    r.t40,
+    r.t99,
+    r.d11,
+    r.d23,
+    r.a09,
+    r.a10,
+    r.u22,
+    r.u97,
+    r.a12,
+    r.c24,
+    r.c14,
+    r.c15,
+    r.c16,
+    r.c17,
+    r.c18,
+    r.c19,
+    r.c20,
+    r.c36,
+    r.b10,
+    r.b11,
+    r.b12,
+    r.b13,
+    r.c01,
+    r.c05,
+    r.c12,
+    r.c04,
+    r.c06,
+    r.c09,
+    r.c11,
+    r.c07,
+    r.c08,
+    r.c10,
+    r.c13,
+    r.c38,
+    r.c39,
+    r.c35,
+    r.a07,
+    r.a08,
+    r.a11,
+    r.a13,
+    r.a20,
+    r.a15,
+    r.a40,
+    r.u11,
+    r.u30,
+    r.u50,
+    r.c22,
+    r.b14,
+    r.ar1,
+    r.ar2,
+    r.ar3,
+    r.ar4,
+    r.ar5,
+    r.ar6,
+    r.ar1a,
+    r.ar1b,
+    r.ar2a,
+    r.ar6a,
+    e.totalexp,
+    e.tcurinst,
+    e.e13,
+    e.tcurssvc,
+    e.e17,
+    e.e07,
+    e.e08,
+    e.e09,
+    e.e15,
+    e.e27,
+    e.tcuroth,
+    e.e11,
+    e.e10a,
+    e.tnonelse,
+    e.j10,
+    e.j11,
+    e.e10b,
+    e.j12,
+    e.j13,
+    e.j15,
+    e.tcapout,
+    e.f12,
+    e.k12,
+    e.g15,
+    e.tcurelsc,
+    e.l12,
+    e.m12,
+    e.q11,
+    e.i86,
+    e.z32,
+    e.z33,
+    e.v35,
+    e.v40,
+    e.v45,
+    e.v50,
+    e.v55,
+    e.v85,
+    e.v60,
+    e.v65,
+    e.v70,
+    e.v75,
+    e.v80,
+    e.k09,
+    e.k10,
+    e.k11,
+    e.v11,
+    e.v13,
+    e.v15,
+    e.v17,
+    e.v19,
+    e.v21,
+    e.v23,
+    e.v25,
+    e.v27,
+    e.v29,
+    e.z34,
+    e.v10,
+    e.v30,
+    e.v32,
+    e.v91,
+    e.v92,
+    e.v90,
+    e.v37,
+    e.v38,
+    e.z35,
+    e.z36,
+    e.z37,
+    e.z38,
+    e.v93,
+    e.hr1,
+    e.he1,
+    e.he2,
+    e.v95,
+    e.v02,
+    e.k14,
+    e.ce1,
+    e.ce2,
+    e.ce3,
+    e.se1,
+    e.se2,
+    e.se3,
+    e.se4,
+    e.se5,
+    e.ae1,
+    e.ae2,
+    e.ae3,
+    e.ae4,
+    e.ae5,
+    e.ae6,
+    e.ae7,
+    e.ae8,
+    e.ae1a,
+    e.ae1b,
+    e.ae1c,
+    e.ae1d,
+    e.ae1e,
+    e.ae1f,
+    e.ae1g,
+    e.ae2a,
+    e.ae2b,
+    e.ae2c,
+    e.ae2d,
+    e.ae2e,
+    e.ae2f,
+    e.ae2g,
+    e.ae4a,
+    e.ae4b,
+    e.ae4c,
+    e.ae4d,
+    e.ae4e,
+    e.ae4f,
+    e.ae4g,
+    e.v12,
+    e.v14,
+    e.v16,
+    e.v18,
+    e.v20,
+    e.v22,
+    e.v24,
+    e.v26,
+    e.v28,
+    b._19h,
+    b._21f,
+    b._31f,
+    b._41f,
+    b._61v,
+    b._66v,
+    b.w01,
+    b.w31,
+    b.w61,
+    f.fl_v33,
+    f.fl_c14,
+    f.fl_c15,
+    f.fl_c16,
+    f.fl_c17,
+    f.fl_c18,
+    f.fl_c19,
+    f.fl_c20,
+    f.fl_c25,
+    f.fl_c36,
+    f.fl_b10,
+    f.fl_b11,
+    f.fl_b12,
+    f.fl_b13,
+    f.fl_c01,
+    f.fl_c04,
+    f.fl_c05,
+    f.fl_c06,
+    f.fl_c07,
+    f.fl_c08,
+    f.fl_c09,
+    f.fl_c10,
+    f.fl_c11,
+    f.fl_c12,
+    f.fl_c13,
+    f.fl_c35,
+    f.fl_c38,
+    f.fl_c39,
+    f.fl_t02,
+    f.fl_t06,
+    f.fl_t09,
+    f.fl_t15,
+    f.fl_t40,
+    f.fl_t99,
+    f.fl_d11,
+    f.fl_d23,
+    f.fl_a07,
+    f.fl_a08,
+    f.fl_a09,
+    f.fl_a11,
+    f.fl_a13,
+    f.fl_a15,
+    f.fl_a20,
+    f.fl_u22,
+    f.fl_u97,
+    f.fl_c24,
+    f.fl_e13,
+    f.fl_v91,
+    f.fl_v92,
+    f.fl_e17,
+    f.fl_e07,
+    f.fl_e08,
+    f.fl_e09,
+    f.fl_v40,
+    f.fl_v45,
+    f.fl_v90,
+    f.fl_v85,
+    f.fl_e11,
+    f.fl_v60,
+    f.fl_v65,
+    f.fl_v70,
+    f.fl_v75,
+    f.fl_v80,
+    f.fl_f12,
+    f.fl_g15,
+    f.fl_k09,
+    f.fl_k10,
+    f.fl_k11,
+    f.fl_l12,
+    f.fl_m12,
+    f.fl_q11,
+    f.fl_i86,
+    f.fl_z32,
+    f.fl_z33,
+    f.fl_v11,
+    f.fl_v13,
+    f.fl_v15,
+    f.fl_v17,
+    f.fl_v21,
+    f.fl_v23,
+    f.fl_v37,
+    f.fl_v29,
+    f.fl_z34,
+    f.fl_v10,
+    f.fl_v12,
+    f.fl_v14,
+    f.fl_v16,
+    f.fl_v18,
+    f.fl_v22,
+    f.fl_v24,
+    f.fl_v38,
+    f.fl_v30,
+    f.fl_v32,
+    f.fl_19h,
+    f.fl_21f,
+    f.fl_31f,
+    f.fl_41f,
+    f.fl_61v,
+    f.fl_66v,
+    f.fl_w01,
+    f.fl_w31,
+    f.fl_w61,
+    f.fl_z35,
+    f.fl_z36,
+    f.fl_z37,
+    f.fl_z38,
+    f.fl_v93,
+    f.fl_a40,
+    f.fl_u11,
+    f.fl_u30,
+    f.fl_u50,
+    f.fl_hr1,
+    f.fl_he1,
+    f.fl_he2,
+    f.fl_membersch,
+    f.fl_v95,
+    f.fl_v02,
+    f.fl_k14,
+    f.fl_ce1,
+    f.fl_ce2,
+    f.fl_ce3,
+    f.fl_c22,
+    f.fl_c23,
+    f.fl_c26,
+    f.fl_c27,
+    f.fl_b14,
+    f.fl_se1,
+    f.fl_se2,
+    f.fl_se3,
+    f.fl_se4,
+    f.fl_se5,
+    f.fl_ar1,
+    f.fl_ar2,
+    f.fl_ar3,
+    f.fl_ar4,
+    f.fl_ar5,
+    f.fl_ar6,
+    f.fl_ae1,
+    f.fl_ae2,
+    f.fl_ae3,
+    f.fl_ae4,
+    f.fl_ae5,
+    f.fl_ae6,
+    f.fl_ar1a,
+    f.fl_ar1b,
+    f.fl_ar2a,
+    f.fl_ar6a,
+    f.fl_ae7,
+    f.fl_ae8,
+    f.fl_ae1a,
+    f.fl_ae1b,
+    f.fl_ae1c,
+    f.fl_ae1d,
+    f.fl_ae1e,
+    f.fl_ae1f,
+    f.fl_ae1g,
+    f.fl_ae2a,
+    f.fl_ae2b,
+    f.fl_ae2c,
+    f.fl_ae2d,
+    f.fl_ae2e,
+    f.fl_ae2f,
+    f.fl_ae2g,
+    f.fl_ae4a,
+    f.fl_ae4b,
+    f.fl_ae4c,
+    f.fl_ae4d,
+    f.fl_ae4e,
+    f.fl_ae4f,
+    f.fl_ae4g
+FROM fiscal_district AS d
+LEFT JOIN fiscal_revenue AS r USING (end_year, leaid)
+LEFT JOIN fiscal_expenditure AS e USING (end_year, leaid)
+LEFT JOIN fiscal_debt AS b USING (end_year, leaid)
+LEFT JOIN fiscal_flags AS f USING (end_year, leaid);
+
+-- States and territories with their FIPS code, abbreviation, name and NAEP
+-- jurisdiction code (ccd_db/jurisdictions.csv), loaded by
+-- district_directory_prep.py. load_jurisdictions also makes its unique st and
+-- naep_code indexes.
+CREATE TABLE jurisdiction (
+    fipst INTEGER PRIMARY KEY,
+    st TEXT,
+    name TEXT,
+    naep_code TEXT
+);
+
+-- CPI-U annual averages (ccd_db/cpi_u_annual.csv), loaded by
+-- district_per_pupil_prep.py. version says which series and years it is.
+CREATE TABLE cpi (
+    year INTEGER PRIMARY KEY,
+    cpi_u REAL,
+    version TEXT
+);
+
+-- Spending per student, worked out from fiscal and enrollment_totals
+-- (membership without adult education) by district_per_pupil_prep.py. The
+-- *_real columns are in dollars_year dollars (CPI-U), NULL for years the CPI
+-- doesn't cover yet.
+CREATE TABLE per_pupil (
     end_year INTEGER,
-    fipst INTEGER,
-    v33 INTEGER,
-    totalrev INTEGER,
-    tfedrev INTEGER,
-    c25 INTEGER,
-    c26 INTEGER,
-    b26 INTEGER,
-    tstrev INTEGER,
-    c23 INTEGER,
-    c27 INTEGER,
-    tlocrev INTEGER,
-    t02 INTEGER,
-    t06 INTEGER,
-    t09 INTEGER,
-    t15 INTEGER,
-    t40 INTEGER,
-    t99 INTEGER,
-    d11 INTEGER,
-    d23 INTEGER,
-    a09 INTEGER,
-    a10 INTEGER,
-    u22 INTEGER,
-    u97 INTEGER,
-    a12 INTEGER,
-    c24 INTEGER,
-    totalexp INTEGER,
-    tcurinst INTEGER,
-    e13 INTEGER,
-    tcurssvc INTEGER,
-    e17 INTEGER,
-    e07 INTEGER,
-    e08 INTEGER,
-    e09 INTEGER,
-    e15 INTEGER,
-    e27 INTEGER,
-    tcuroth INTEGER,
-    e11 INTEGER,
-    e10a INTEGER,
-    tnonelse INTEGER,
-    j10 INTEGER,
-    j11 INTEGER,
-    e10b INTEGER,
-    j12 INTEGER,
-    j13 INTEGER,
-    j15 INTEGER,
-    tcapout INTEGER,
-    f12 INTEGER,
-    k12 INTEGER,
-    g15 INTEGER,
-    tcurelsc INTEGER,
-    l12 INTEGER,
-    m12 INTEGER,
-    q11 INTEGER,
-    i86 INTEGER,
-    z32 INTEGER,
-    z33 INTEGER,
-    _19h INTEGER,
-    _21f INTEGER,
-    _31f INTEGER,
-    _41f INTEGER,
-    _61v INTEGER,
-    _66v INTEGER,
-    w01 INTEGER,
-    w31 INTEGER,
-    w61 INTEGER,
-    district_weight INTEGER,
-    ccdnf INTEGER,
-    c14 INTEGER,
-    c15 INTEGER,
-    c16 INTEGER,
-    c17 INTEGER,
-    c18 INTEGER,
-    c19 INTEGER,
-    c20 INTEGER,
-    c36 INTEGER,
-    b10 INTEGER,
-    b11 INTEGER,
-    b12 INTEGER,
-    b13 INTEGER,
-    c01 INTEGER,
-    c05 INTEGER,
-    c12 INTEGER,
-    c04 INTEGER,
-    c06 INTEGER,
-    c09 INTEGER,
-    c11 INTEGER,
-    c07 INTEGER,
-    c08 INTEGER,
-    c10 INTEGER,
-    c13 INTEGER,
-    c38 INTEGER,
-    c39 INTEGER,
-    c35 INTEGER,
-    a07 INTEGER,
-    a08 INTEGER,
-    a11 INTEGER,
-    a13 INTEGER,
-    a20 INTEGER,
-    a15 INTEGER,
-    v35 INTEGER,
-    v40 INTEGER,
-    v45 INTEGER,
-    v50 INTEGER,
-    v55 INTEGER,
-    v85 INTEGER,
-    v60 INTEGER,
-    v65 INTEGER,
-    v70 INTEGER,
-    v75 INTEGER,
-    v80 INTEGER,
-    k09 INTEGER,
-    k10 INTEGER,
-    k11 INTEGER,
-    v11 INTEGER,
-    v13 INTEGER,
-    v15 INTEGER,
-    v17 INTEGER,
-    v19 INTEGER,
-    v21 INTEGER,
-    v23 INTEGER,
-    v25 INTEGER,
-    v27 INTEGER,
-    v29 INTEGER,
-    z34 INTEGER,
-    v10 INTEGER,
-    v30 INTEGER,
-    v32 INTEGER,
-    fipsco INTEGER,
-    v91 INTEGER,
-    v92 INTEGER,
-    v90 INTEGER,
-    v37 INTEGER,
-    v38 INTEGER,
-    cenfile INTEGER,
-    z35 INTEGER,
-    z36 INTEGER,
-    z37 INTEGER,
-    z38 INTEGER,
-    v93 INTEGER,
-    a40 INTEGER,
-    u11 INTEGER,
-    u30 INTEGER,
-    u50 INTEGER,
-    hr1 INTEGER,
-    he1 INTEGER,
-    he2 INTEGER,
-    membersch INTEGER,
-    v95 INTEGER,
-    v02 INTEGER,
-    k14 INTEGER,
-    ce1 INTEGER,
-    ce2 INTEGER,
-    ce3 INTEGER,
-    c22 INTEGER,
-    b14 INTEGER,
-    se1 INTEGER,
-    se2 INTEGER,
-    se3 INTEGER,
-    se4 INTEGER,
-    se5 INTEGER,
-    ar1 INTEGER,
-    ar2 INTEGER,
-    ar3 INTEGER,
-    ar4 INTEGER,
-    ar5 INTEGER,
-    ar6 INTEGER,
-    ae1 INTEGER,
-    ae2 INTEGER,
-    ae3 INTEGER,
-    ae4 INTEGER,
-    ae5 INTEGER,
-    ae6 INTEGER,
-    ar1a INTEGER,
-    ar1b INTEGER,
-    ar2a INTEGER,
-    ar6a INTEGER,
-    ae7 INTEGER,
-    ae8 INTEGER,
-    ae1a INTEGER,
-    ae1b INTEGER,
-    ae1c INTEGER,
-    ae1d INTEGER,
-    ae1e INTEGER,
-    ae1f INTEGER,
-    ae1g INTEGER,
-    ae2a INTEGER,
-    ae2b INTEGER,
-    ae2c INTEGER,
-    ae2d INTEGER,
-    ae2e INTEGER,
-    ae2f INTEGER,
-    ae2g INTEGER,
-    ae4a INTEGER,
-    ae4b INTEGER,
-    ae4c INTEGER,
-    ae4d INTEGER,
-    ae4e INTEGER,
-    ae4f INTEGER,
-    ae4g INTEGER,
-    v12 REAL,
-    v14 REAL,
-    v16 REAL,
-    v18 REAL,
-    v20 REAL,
-    v22 REAL,
-    v24 REAL,
-    v26 REAL,
-    v28 REAL
+    leaid INTEGER,
+    enrollment INTEGER,
+    current_per_pupil REAL,
+    instruction_per_pupil REAL,
+    total_per_pupil REAL,
+    current_per_pupil_real REAL,
+    instruction_per_pupil_real REAL,
+    total_per_pupil_real REAL,
+    dollars_year INTEGER,
+    PRIMARY KEY (end_year, leaid)
+);
+
+-- When each (table, end_year) was last loaded and by which script. Written by
+-- replace_partitions in ccd_db/bulk_load.py.
+CREATE TABLE load_log (
+    table_name TEXT,
+    end_year INTEGER,
+    row_count INTEGER,
+    source TEXT,
+    loaded_at TEXT,
+    PRIMARY KEY (table_name, end_year)
+);
+
+-- The id of the latest load, a new one every time replace_partitions (or
+-- replace_table) runs. Cached query results (ccd_db/cache.py) are keyed on
+-- it, so they go stale as soon as the data changes.
+CREATE TABLE build_info (
+    build_id TEXT,
+    source TEXT,
+    built_at TEXT
 );
 
--- Indexes to speed up common queries
-CREATE INDEX idx_membership_end_year_leaid ON membership (end_year, leaid);
-CREATE INDEX idx_fiscal_end_year_leaid ON fiscal (end_year, leaid);
-CREATE INDEX idx_membership_total_indicator ON membership (total_indicator);
+-- Indexes are in district_indexes.sql. They're created by district_db_indexes.py
+-- once all the prep scripts have loaded their data, so the inserts don't have
+-- to keep the index B-trees up to date row by row.
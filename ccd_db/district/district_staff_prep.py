@@ -8,11 +8,19 @@ and earlier)
 '''
 #%%
 
-import sqlite3
+import sys
 import pandas as pd
 import numpy as np
 
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.bulk_load import connect, replace_partitions, select_years
+
 PRE_PATH = "data/nonfiscal/staff/staff_"
+
+# Years to (re)load into the database, eg. [2024] when a new CCD release comes
+# out. None loads every year. Years that aren't loaded are left alone.
+LOAD_YEARS = None
+
 files = {year: [f'{PRE_PATH}{year}.csv', '', ',', {}]
          for year in range(2023, 2014, -1)}
 
@@ -116,16 +124,9 @@ staff = staff.assign(
     )
 
 # Concat with 2014 and earlier data
-float_cols = ['CORSUP', 'ELMGUI', 'ELMTCH', 'KGTCH', 'LEAADM', 'LEASUP',
-              'LIBSPE', 'LIBSUP', 'OTHSUP', 'PARA', 'PKTCH', 'SCHADM',
-              'SCHSUP', 'SECGUI', 'SECTCH', 'TOTGUI', 'TOTTCH', 'UGTCH',
-              'STUSUP']
-
 staff = pd.concat([staff,
-                   pd.read_csv("data/nonfiscal/staff/staff_through_2014.csv",
-                               dtype={x: float for x in float_cols},
-                               na_values={x: ['M', 'N'] for x in float_cols}
-                               )
+                   pd.read_parquet(
+                       "data/nonfiscal/staff/staff_through_2014.parquet")
                    ],
                   ignore_index=True)
 
@@ -149,52 +150,15 @@ staff = staff.rename(columns = {'UNION': 'UNION_CODE'})
 staff_columns = [col for col in staff.columns
                  if col not in ['STATENAME', 'ST']]
 
-col_dtypes = {
-    'end_year': 'INTEGER',
-    'fipst': 'INTEGER',
-    'lea_name': 'TEXT',
-    'state_agency_no': 'INTEGER',
-    'union': 'TEXT',
-    'st_leaid': 'TEXT',
-    'leaid': 'INTEGER',
-    'corsup': 'REAL',
-    'elmgui': 'REAL',
-    'elmtch': 'REAL',
-    'gui': 'REAL',
-    'kgtch': 'REAL',
-    'leaadm': 'REAL',
-    'leasta': 'REAL',
-    'leasup': 'REAL',
-    'libspe': 'REAL',
-    'libsup': 'REAL',
-    'othsta': 'REAL',
-    'othsup': 'REAL',
-    'para': 'REAL',
-    'pktch': 'REAL',
-    'schadm': 'REAL',
-    'schpsych': 'REAL',
-    'schsta': 'REAL',
-    'schsup': 'REAL',
-    'secgui': 'REAL',
-    'sectch': 'REAL',
-    'stusupwopsych': 'REAL',
-    'total': 'REAL',
-    'totgui': 'REAL',
-    'tottch': 'REAL',
-    'ugtch': 'REAL',
-    'stusup': 'REAL'}
-
 # Connect to database and append to created table.
-conn = sqlite3.connect('district.db')
+conn = connect('data/district.db')
 cursor = conn.cursor()
 
-(staff[staff_columns]
- .rename(dict(zip(staff.columns, staff.columns.str.lower())))
- .to_sql('staff',
-         con=conn,
-         if_exists='append',
-         index=False,
-         dtype=col_dtypes)
+replace_partitions(
+    conn,
+    {'staff': select_years(staff[staff_columns].rename(columns=str.lower),
+                           LOAD_YEARS)},
+    'district_staff_prep.py'
 )
 
 conn.close()
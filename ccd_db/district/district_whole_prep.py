@@ -6,8 +6,12 @@ Script to organize 1987-2024 datasets from the CCD nonfiscal datasets
 '''
 #%%
 
+import sys
 import pandas as pd
 
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.handoff import write_intermediate
+
 ################################
 # YEARS 2008-2014
 ################################
@@ -253,9 +257,15 @@ whole = whole.rename({'OTHGUI': 'GUI',
 
 # Then something like the following:
 staff_cols_we_want = [x for x in staff_cols if x in whole.columns]
-whole[staff_cols_we_want].to_csv(
-    'data/nonfiscal/staff/staff_through_2014.csv',
-    index=False)
+float_cols = ['CORSUP', 'ELMGUI', 'ELMTCH', 'KGTCH', 'LEAADM', 'LEASUP',
+              'LIBSPE', 'LIBSUP', 'OTHSUP', 'PARA', 'PKTCH', 'SCHADM',
+              'SCHSUP', 'SECGUI', 'SECTCH', 'TOTGUI', 'TOTTCH', 'UGTCH',
+              'STUSUP']
+float_cols = [x for x in float_cols if x in staff_cols_we_want]
+write_intermediate(whole[staff_cols_we_want],
+                   'data/nonfiscal/staff/staff_through_2014.parquet',
+                   dtype={x: float for x in float_cols},
+                   na_values={x: ['M', 'N'] for x in float_cols})
 
 ################################################
 # For merging DIRECTORY
@@ -307,9 +317,26 @@ whole = whole.rename({'MSTREE': 'MSTREET1',
 
 # Then something like the following:
 directory_cols_we_want = [x for x in directory_cols if x in whole.columns]
-whole[directory_cols_we_want].to_csv(
-    'data/nonfiscal/directory/directory_through_2014.csv',
-    index=False)
+directory_types = {'UNION': 'category',
+                   'FIPST': int,
+                   'MSTREET1': str,
+                   'MZIP': str,
+                   'MZIP4': str,
+                   'LSTREET1': str,
+                   'LCITY': str,
+                   'LSTATE': str,
+                   'LZIP': str,
+                   'LZIP4': str,
+                   'PHONE': str,
+                   'CHARTER_LEA': 'category',
+                   'OPERATIONAL_SCHOOLS': 'Int64',
+                   'AGCHRT': 'category'
+                   }
+write_intermediate(whole[directory_cols_we_want],
+                   'data/nonfiscal/directory/directory_through_2014.parquet',
+                   dtype={x: kind for x, kind in directory_types.items()
+                          if x in directory_cols_we_want},
+                   na_values={'OPERATIONAL_SCHOOLS': ['N']})
 
 ################################################
 # For merging MEMBERSHIP
@@ -336,9 +363,14 @@ whole = whole.rename({'WHITE': 'WH',
 
 # Then something like the following:
 membership_cols_we_want = [x for x in membership_cols if x in whole.columns]
-whole[membership_cols_we_want].to_csv(
-    'data/nonfiscal/membership/membership_through_2014.csv',
-    index=False)
+write_intermediate(whole[membership_cols_we_want],
+                   'data/nonfiscal/membership/membership_through_2014.parquet',
+                   dtype={'ST_LEAID': 'string',
+                          'UG': 'Int64',
+                          'MEMBER': 'Int64',
+                          'IAMEMPUP': 'category'},
+                   na_values={'UG': ['N', 'M'],
+                              'MEMBER': ['N', 'M']})
 
 #%%
 ################################################
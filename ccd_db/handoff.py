@@ -0,0 +1,82 @@
+'''
+Typed Parquet handoff for the *_through_2014 intermediates.
+
+The whole_prep scripts used to write the pre-2015 columns out as CSV and the
+directory/staff/membership prep scripts had to re-parse all that text with
+their own dtype and na_values maps. Now the typing happens once, here, on the
+way out, and the readers just do
+
+    pd.read_parquet('data/nonfiscal/staff/staff_through_2014.parquet')
+
+and get back exactly the dtypes that were written (Int64, category, strings,
+...). Needs pyarrow.
+'''
+
+import pandas as pd
+
+def _matches(column, values):
+    ''' Boolean mask of the entries in column equal to any of values. '''
+    text = [str(value) for value in values]
+    numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce')
+    mask = column.astype(str).isin(text)
+    if numbers.notna().any():
+        mask |= pd.to_numeric(column, errors='coerce').isin(numbers.dropna())
+    return mask & column.notna()
+
+def type_frame(frame, dtype=None, na_values=None):
+    '''
+    Give frame the types read_csv would have after a to_csv round trip.
+
+    na_values is a list (every column) or a dict of column -> list of values
+    to treat as missing, and dtype is a dict of column -> type, same as the
+    read_csv arguments. Any other object or string column becomes a number
+    if every value is one, otherwise strings, since the concat of the fixed
+    width and csv years leaves a mix of both in there.
+    '''
+    frame = frame.copy()
+    dtype = dtype or {}
+
+    if na_values is None:
+        na_values = {}
+    elif not isinstance(na_values, dict):
+        na_values = {column: na_values for column in frame.columns}
+
+    for column, values in na_values.items():
+        mask = _matches(frame[column], values)
+        if mask.any():
+            frame[column] = frame[column].mask(mask)
+
+    for column in frame.columns:
+        # pandas 3 reads text as the str dtype rather than object.
+        if column in dtype or not (
+                frame[column].dtype == object
+                or pd.api.types.is_string_dtype(frame[column].dtype)):
+            continue
+        # As object, so missing values come out as NaN like read_csv's.
+        values = frame[column].astype(object)
+        try:
+            frame[column] = pd.to_numeric(values)
+        except (ValueError, TypeError):
+            # infer_objects makes it the str dtype on pandas 3, object
+            # before, same as read_csv.
+            frame[column] = (values.where(values.isna(), values.astype(str))
+                             .infer_objects())
+
+    for column, kind in dtype.items():
+        if kind in (int, float, 'Int64', 'Float64'):
+            frame[column] = pd.to_numeric(frame[column]).astype(kind)
+            continue
+        # read_csv hands str and category columns the text as written, and
+        # keeps missing values missing instead of the string 'nan'.
+        frame[column] = frame[column].where(frame[column].isna(),
+                                            frame[column].astype(str))
+        if kind is not str:
+            frame[column] = frame[column].astype(kind)
+
+    return frame
+
+def write_intermediate(frame, path, dtype=None, na_values=None):
+    '''
+    Type frame with type_frame and write it to path as Parquet.
+    '''
+    type_frame(frame, dtype, na_values).to_parquet(path, index=False)
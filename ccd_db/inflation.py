@@ -0,0 +1,53 @@
+'''
+Inflation adjustment from a CPI series that ships with the repo.
+
+cpi_u_annual.csv is the BLS CPI-U (U.S. city average, all items, not
+seasonally adjusted, series CUUR0000SA0) annual averages, 1982-84 = 100. The
+cpi package did the same job but is slow to import, looks things up one year
+at a time, and cpi.update() needs the network. To add a year, append a line
+to the csv and rebuild; the version is the csv's last year, so the per_pupil
+stages rerun and the cpi table in each database says which series it has.
+
+The build loads the series into a cpi table in state.db and district.db
+(load_cpi), so SQL can adjust with a join, eg.
+
+    SELECT te11 * (SELECT cpi_u FROM cpi WHERE year = 2024) / cpi.cpi_u
+    FROM fiscal JOIN cpi ON cpi.year = fiscal.end_year
+'''
+
+import os
+import pandas as pd
+from ccd_db.bulk_load import replace_table
+
+CPI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'cpi_u_annual.csv')
+CPI_SERIES = 'CUUR0000SA0'
+
+def read_cpi(path=CPI_PATH):
+    ''' The CPI-U series as a Series of cpi_u indexed by year. '''
+    return pd.read_csv(path, index_col='year')['cpi_u']
+
+def cpi_version(cpi):
+    ''' Version string for a series, eg. 'CUUR0000SA0 1970-2024'. '''
+    return f'{CPI_SERIES} {cpi.index.min()}-{cpi.index.max()}'
+
+def inflation_factors(years, to_year=None, cpi=None):
+    '''
+    What a dollar in each of years is worth in to_year dollars (default the
+    last year of the series), as a float Series lined up with years. NaN for
+    years the series doesn't cover.
+    '''
+    cpi = read_cpi() if cpi is None else cpi
+    to_year = cpi.index.max() if to_year is None else to_year
+    years = pd.Series(years)
+    return (cpi[to_year] / years.map(cpi)).astype('float64')
+
+def load_cpi(conn, cpi=None):
+    '''
+    Replace the cpi table in the database (year, cpi_u, version) with the
+    bundled series.
+    '''
+    cpi = read_cpi() if cpi is None else cpi
+    frame = cpi.rename('cpi_u').reset_index()
+    frame['version'] = cpi_version(cpi)
+    replace_table(conn, frame, 'cpi')
@@ -0,0 +1,69 @@
+'''
+FIPS state codes, postal abbreviations, names and NAEP jurisdiction codes.
+
+jurisdictions.csv has the 50 states, DC and the five inhabited territories.
+NAEP uses the postal abbreviation for states and territories (its national,
+regional and district jurisdictions, eg. NP or XC, have no FIPS code and
+aren't in here). The directory prep scripts load it into a jurisdiction table
+in state.db and district.db (load_jurisdictions), and notebooks can look
+things up straight from the csv without a database or the network:
+
+    from ccd_db import jurisdictions
+    state_name_mapping = jurisdictions.mapping('st', 'name')
+'''
+
+import os
+from functools import lru_cache
+import pandas as pd
+from ccd_db.bulk_load import replace_table
+
+JURISDICTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  'jurisdictions.csv')
+
+@lru_cache(maxsize=None)
+def read_jurisdictions(path=JURISDICTIONS_PATH):
+    ''' The jurisdictions as a DataFrame (read once and cached). '''
+    return pd.read_csv(path, dtype={'fipst': 'int64'}, keep_default_na=False)
+
+@lru_cache(maxsize=None)
+def mapping(key, value):
+    '''
+    Dict from one column to another, eg. mapping('st', 'name') or
+    mapping('fipst', 'st'). key is 'fipst', 'st', 'name' or 'naep_code'.
+    '''
+    table = read_jurisdictions()
+    return dict(zip(table[key], table[value]))
+
+def lookup(values, key='st', value='name'):
+    '''
+    value for each of values (matched on the key column), None where there's
+    no match.
+    '''
+    table = mapping(key, value)
+    return [table.get(item) for item in values]
+
+def load_jurisdictions(conn):
+    '''
+    Replace the jurisdiction table in the database with the csv. The table
+    and its unique st and naep_code indexes are made here if they aren't
+    there yet, so they go wherever the table does (benchmark databases and
+    ones made before the table was in the schema don't have it).
+    '''
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jurisdiction (
+            fipst INTEGER PRIMARY KEY,
+            st TEXT,
+            name TEXT,
+            naep_code TEXT
+        )
+    ''')
+    replace_table(conn, read_jurisdictions(), 'jurisdiction')
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_jurisdiction_st
+        ON jurisdiction (st)
+    ''')
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_jurisdiction_naep_code
+        ON jurisdiction (naep_code)
+    ''')
+    conn.commit()
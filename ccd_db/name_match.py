@@ -0,0 +1,228 @@
+'''
+Matching school and district names across files that spell them differently.
+
+'C.S. LEWIS ACADEMY' in one year is 'CS LEWIS ACADEMY' in the next, and
+'NO. UT. ACAD. FOR MATH ENGINEERING & SCIENCE' is 'NO UT ACAD FOR MATH
+ENGINEERING & SCIENCE (NUAMES)' somewhere else. normalize_names turns a name
+into a key that ignores case, punctuation, parentheticals and the usual
+abbreviations, and
+
+- canonical_names spells every name the way one row (eg. the latest year)
+  does, for lining names up within a file. Its key keeps parentheticals,
+  and groups (eg. the LEA, for school names) are lined up separately.
+- match_names finds the closest candidate for each name (eg. Utah LEA names
+  against CCD LEA_NAMEs), exact keys first and then by the character
+  trigrams the keys share. Trigrams go in an inverted index (a merge on the
+  gram), so it's all done in bulk and tens of thousands of names take
+  seconds, not a comparison of every pair.
+
+    from ccd_db.name_match import match_names
+    matches = match_names(utah['lea_name'], ccd['lea_name'])
+'''
+
+import re
+import pandas as pd
+
+# Whole words, after punctuation is gone. No NO/SO (NORTH/SOUTH) or MS
+# (MIDDLE SCHOOL): 'SCHOOL DISTRICT NO 1' is a number, not a direction.
+ABBREVIATIONS = {
+    'ACAD': 'ACADEMY',
+    'CTR': 'CENTER',
+    'DIST': 'DISTRICT',
+    'ELEM': 'ELEMENTARY',
+    'HS': 'HIGH SCHOOL',
+    'INTL': 'INTERNATIONAL',
+    'JR': 'JUNIOR',
+    'MT': 'MOUNT',
+    'PREP': 'PREPARATORY',
+    'SCH': 'SCHOOL',
+    'SCHL': 'SCHOOL',
+    'SCI': 'SCIENCE',
+    'SD': 'SCHOOL DISTRICT',
+    'TECH': 'TECHNOLOGY',
+    'UT': 'UTAH'
+}
+
+def _normalize(name, parentheticals=False):
+    name = name.upper()
+    if not parentheticals:
+        name = re.sub(r'\([^)]*\)', ' ', name)  # (AMES), (NUAMES)
+    name = name.replace('&', ' AND ').replace('.', '').replace("'", '')
+    tokens = re.sub(r'[^A-Z0-9]+', ' ', name).split()
+    return ' '.join(ABBREVIATIONS.get(token, token) for token in tokens)
+
+def normalize_names(names, parentheticals=False):
+    '''
+    Matching key for each of names (a Series): upper case, no
+    parentheticals, '&' -> AND, no punctuation ('C.S.' -> CS), single
+    spaces, and ABBREVIATIONS spelled out. NA stays NA. parentheticals=True
+    keeps what's inside them as words ('DRAPER (2)' -> DRAPER 2).
+    '''
+    names = names.astype('string')
+    unique = names.dropna().unique()
+    keys = dict(zip(unique, [_normalize(name, parentheticals)
+                             for name in unique]))
+    return names.map(keys).astype('string')
+
+def canonical_names(names, order=None, groups=None):
+    '''
+    names with every spelling that has the same key in the same group
+    replaced by one of them: the one on the row with the largest order (eg.
+    end_year), or the last row if order is None. The key keeps what's in
+    parentheses, so 'DRAPER (1)' and 'DRAPER (2)' stay apart, and groups (eg.
+    the LEA id, for school names) keeps the same name in two districts
+    apart.
+    '''
+    frame = pd.DataFrame({
+        'name': names.astype('string').to_numpy(),
+        'key': normalize_names(names, parentheticals=True).to_numpy(),
+        'group': 0 if groups is None else groups.to_numpy(),
+        'order': range(len(names)) if order is None else order.to_numpy()
+    })
+    spelling = (
+        frame
+        .dropna(subset='key')
+        .sort_values('order', kind='stable')
+        .drop_duplicates(subset=['group', 'key'], keep='last')
+        .loc[:, ['group', 'key', 'name']]
+        .rename(columns={'name': 'canonical'})
+    )
+    canonical = frame.merge(spelling, on=['group', 'key'], how='left')
+    return pd.Series(canonical['canonical'].fillna(canonical['name'])
+                     .to_numpy(), index=names.index)
+
+def name_grams(keys, n=3):
+    '''
+    (name_id, gram) for every distinct character n-gram of each key, with
+    the key padded by a space at each end so the first and last letters
+    count. name_id is the position in keys.
+    '''
+    grams = [
+        {f' {key} '[i:i + n] for i in range(len(key) - n + 3)}
+        if isinstance(key, str) else set()
+        for key in keys
+    ]
+    return (
+        pd.DataFrame({'name_id': range(len(keys)), 'gram': grams})
+        .explode('gram')
+        .dropna()
+    )
+
+def match_names(names, candidates, groups=None, candidate_groups=None,
+                min_score=0.7, max_gram_share=0.05, max_candidates=20):
+    '''
+    The best candidate for each of names. Returns a DataFrame with the index
+    of names and columns match (the index label of the candidate), matched
+    (its name) and score: 1 for the same key, otherwise the Dice
+    coefficient of the two keys' trigrams. Names without a candidate
+    scoring at least min_score get NA.
+
+    groups/candidate_groups (eg. fipst, or leaid for school names) keep
+    matches within the same group. Trigrams that are in more than
+    max_gram_share of the candidates (eg. 'OOL', once there are thousands of
+    them) aren't used to find candidates, only to score them, so common
+    words don't make every name a candidate for every other, and only the
+    max_candidates sharing the most of the rest get scored.
+    '''
+    keys = normalize_names(names).reset_index(drop=True)
+    candidate_keys = normalize_names(candidates).reset_index(drop=True)
+    group = (pd.Series(0, index=keys.index) if groups is None
+             else pd.Series(groups.to_numpy(), index=keys.index))
+    candidate_group = (pd.Series(0, index=candidate_keys.index)
+                       if candidate_groups is None
+                       else pd.Series(candidate_groups.to_numpy(),
+                                      index=candidate_keys.index))
+
+    # Exact keys first.
+    exact = (
+        pd.DataFrame({'key': candidate_keys, 'group': candidate_group,
+                      'candidate_id': candidate_keys.index})
+        .dropna(subset='key')
+        .drop_duplicates(subset=['key', 'group'])
+    )
+    best = (
+        pd.DataFrame({'key': keys, 'group': group, 'name_id': keys.index})
+        .merge(exact, on=['key', 'group'])
+        .loc[:, ['name_id', 'candidate_id']]
+        .assign(score=1.0)
+    )
+
+    # Then the closest by shared trigrams for the rest.
+    rest = keys[~keys.index.isin(best['name_id'])]
+    if len(rest):
+        best = pd.concat([best, _trigram_matches(
+            rest, group, candidate_keys, candidate_group, min_score,
+            max_gram_share, max_candidates)])
+
+    best = best.set_index('name_id').reindex(keys.index)
+    found = (
+        pd.DataFrame({'match': candidates.index,
+                      'matched': candidates.to_numpy()})
+        .reindex(best['candidate_id'].astype('Int64'))
+    )
+    result = pd.DataFrame({'match': found['match'].to_numpy(),
+                           'matched': found['matched'].to_numpy(),
+                           'score': best['score'].to_numpy()},
+                          index=names.index)
+    return result
+
+def _trigram_matches(keys, group, candidate_keys, candidate_group, min_score,
+                     max_gram_share, max_candidates):
+    grams = name_grams(keys.to_numpy())
+    grams['name_id'] = keys.index[grams['name_id'].to_numpy()]
+    grams['group'] = group[grams['name_id']].to_numpy()
+    candidate_grams = name_grams(candidate_keys.to_numpy()).rename(
+        columns={'name_id': 'candidate_id'})
+    candidate_grams['group'] = (
+        candidate_group[candidate_grams['candidate_id']].to_numpy()
+    )
+
+    # The inverted index: names and candidates that share a rare gram.
+    # A gram in a few hundred names is still fine to look up, so short lists
+    # use every gram.
+    limit = max(max_gram_share * len(candidate_keys), 100)
+    count = candidate_grams.groupby('gram')['candidate_id'].transform('size')
+    pairs = (
+        grams
+        .merge(candidate_grams[count <= limit],
+               on=['gram', 'group'])
+        .groupby(['name_id', 'candidate_id'])
+        .size()
+        .rename('rare')
+        .reset_index()
+        # Only score the candidates sharing the most rare grams.
+        .sort_values(['name_id', 'rare'], ascending=[True, False],
+                     kind='stable')
+        .groupby('name_id')
+        .head(max_candidates)
+        .loc[:, ['name_id', 'candidate_id']]
+    )
+    if pairs.empty:
+        return pairs.assign(score=pd.Series(dtype='float64'))
+
+    # Score the pairs on all their grams.
+    shared = (
+        pairs
+        .merge(grams[['name_id', 'gram']], on='name_id')
+        .merge(candidate_grams[['candidate_id', 'gram']],
+               on=['candidate_id', 'gram'])
+        .groupby(['name_id', 'candidate_id'])
+        .size()
+        .rename('shared')
+        .reset_index()
+    )
+    sizes = grams.groupby('name_id').size()
+    candidate_sizes = candidate_grams.groupby('candidate_id').size()
+    shared['score'] = (
+        2 * shared['shared']
+        / (sizes[shared['name_id']].to_numpy()
+           + candidate_sizes[shared['candidate_id']].to_numpy())
+    )
+
+    return (
+        shared[shared['score'] >= min_score]
+        .sort_values(['name_id', 'score'], ascending=[True, False],
+                     kind='stable')
+        .drop_duplicates(subset='name_id')
+        .loc[:, ['name_id', 'candidate_id', 'score']]
+    )
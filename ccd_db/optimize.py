@@ -0,0 +1,89 @@
+'''
+Final clean up for a built database: page size, planner statistics and a
+VACUUM into a fresh, compacted file.
+
+After all the DELETE + INSERT loads the database file is full of free and
+half empty pages, and the tables are spread around in whatever order the prep
+scripts happened to run. optimize_db
+
+- sets a bigger page size (the fiscal rows are hundreds of columns wide and
+  spill onto overflow pages at sqlite's default of 4096 bytes),
+- runs ANALYZE and PRAGMA optimize so the planner has fresh statistics,
+- VACUUMs INTO a new file, which rewrites every table and index in order at
+  the new page size, and swaps it in for the old one,
+
+and prints the file size and the timings of a few typical queries before and
+after. Used by the <pipeline>_db_optimize.py scripts, the last stage of
+ccd_db/build.py.
+'''
+
+import os
+from time import perf_counter
+from ccd_db.bulk_load import connect
+
+PAGE_SIZE = 16384
+
+def time_queries(path, queries, repeats=3):
+    '''
+    Best of repeats seconds to run and fetch each query in queries (a dict of
+    name -> sql) on the database at path.
+    '''
+    conn = connect(path)
+    times = {}
+    for name, sql in queries.items():
+        best = float('inf')
+        for _ in range(repeats):
+            start = perf_counter()
+            conn.execute(sql).fetchall()
+            best = min(best, perf_counter() - start)
+        times[name] = best
+    conn.close()
+    return times
+
+def optimize_db(path, queries=None, page_size=PAGE_SIZE):
+    '''
+    ANALYZE the database at path and replace it with a VACUUMed copy that has
+    the given page size. queries (name -> sql) are timed before and after.
+    Returns a dict with the sizes, page sizes and timings.
+    '''
+    queries = queries or {}
+    report = {'size_before': os.path.getsize(path),
+              'times_before': time_queries(path, queries)}
+
+    conn = connect(path)
+    report['page_size_before'] = conn.execute('PRAGMA page_size').fetchone()[0]
+    conn.execute('ANALYZE')
+    conn.execute('PRAGMA optimize')
+    conn.commit()
+
+    # A page_size set before VACUUM INTO applies to the new file (sqlite
+    # 3.40 does this; checked again below in case an older one doesn't).
+    fresh = path + '.vacuum'
+    if os.path.exists(fresh):
+        os.remove(fresh)
+    conn.execute(f'PRAGMA page_size = {page_size}')
+    conn.execute('VACUUM INTO ?', (fresh,))
+    conn.close()
+
+    conn = connect(fresh)
+    if conn.execute('PRAGMA page_size').fetchone()[0] != page_size:
+        conn.execute(f'PRAGMA page_size = {page_size}')
+        conn.execute('VACUUM')
+    report['page_size_after'] = conn.execute('PRAGMA page_size').fetchone()[0]
+    conn.close()
+
+    os.replace(fresh, path)
+
+    report['size_after'] = os.path.getsize(path)
+    report['times_after'] = time_queries(path, queries)
+
+    print(f'{path}: {report["size_before"] / 2**20:,.1f}MB '
+          f'({report["page_size_before"]} byte pages) -> '
+          f'{report["size_after"] / 2**20:,.1f}MB '
+          f'({report["page_size_after"]} byte pages)')
+    for name in queries:
+        before = report['times_before'][name] * 1000
+        after = report['times_after'][name] * 1000
+        print(f'  {name}: {before:,.1f}ms -> {after:,.1f}ms')
+
+    return report
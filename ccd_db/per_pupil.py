@@ -0,0 +1,34 @@
+'''
+Spending per student for the per_pupil tables in state.db and district.db.
+
+The <pipeline>_per_pupil_prep.py scripts read each year's spending and
+enrollment out of the database, and per_pupil_table divides the one by the
+other and adjusts for inflation with the bundled CPI-U series (see
+inflation.py), so notebooks and dashboards can read the finished numbers
+instead of joining fiscal and membership and inflating every time.
+'''
+
+from ccd_db.inflation import read_cpi, inflation_factors
+
+def per_pupil_table(frame, id_col, measures, enrollment_col='enrollment'):
+    '''
+    frame has end_year, id_col, enrollment_col and the spending columns named
+    in measures ({'current': column, 'instruction': column, 'total':
+    column}). Returns the rows for the per_pupil table: spending divided by
+    enrollment, nominal and inflation adjusted. Rows without any enrollment
+    are dropped.
+    '''
+    frame = frame[frame[enrollment_col] > 0]
+    cpi = read_cpi()
+    dollars_year = cpi.index.max()
+    factor = inflation_factors(frame['end_year'], dollars_year, cpi)
+
+    table = frame[['end_year', id_col]].copy()
+    table['enrollment'] = frame[enrollment_col]
+    for name, column in measures.items():
+        table[f'{name}_per_pupil'] = frame[column] / frame[enrollment_col]
+    for name in measures:
+        table[f'{name}_per_pupil_real'] = table[f'{name}_per_pupil'] * factor
+    table['dollars_year'] = dollars_year
+
+    return table
@@ -0,0 +1,428 @@
+'''
+Query functions for state.db and district.db that return typed DataFrames.
+
+fetch_frame runs a query the way the notebook used to,
+
+    cursor.execute(sql)
+    frame = pd.DataFrame(cursor.fetchall(),
+                         columns=[column[0] for column in cursor.description])
+
+and then gives the columns the types it was told (nullable Int64 for the
+integer columns, so a NULL doesn't turn them into floats or fail). Building
+the DataFrame any other way from Python rows wasn't any quicker: the time
+is all in sqlite making a tuple per row. fetch_frame(arrow=True) builds
+Arrow arrays instead, which is quicker for big results like district
+membership (see benchmarks/arrow_fetch_benchmark.py).
+
+The functions below wrap the queries state_level_eda.ipynb uses, plus
+district membership slices and the Utah accountability data joined to
+district spending.
+
+    from ccd_db import query
+    conn = query.connect('state')
+    naep = query.naep_scores(conn, subject='MAT', accommodations='R3')
+
+Set USE_CACHE = True to save results on disk and get them back from there
+until the database is rebuilt (see ccd_db/cache.py).
+'''
+
+import os
+import sqlite3
+import pandas as pd
+from ccd_db.cache import cached_frame
+from ccd_db.inflation import inflation_factors
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DB_PATHS = {'state': os.path.join(REPO_ROOT, 'ccd_db', 'state', 'data',
+                                  'state.db'),
+            'district': os.path.join(REPO_ROOT, 'ccd_db', 'district', 'data',
+                                     'district.db'),
+            # Utah accountability data, see state_data/utah/utah_db.py
+            'state_data': os.path.join(REPO_ROOT, 'state_data',
+                                       'state_data.db')}
+
+# Territories, national/regional aggregates and DoDEA/BIE jurisdictions the
+# notebook leaves out. NAEP jurisdictions starting with X are left out too.
+NAEP_EXCLUDED = ('NT', 'NP', 'NR', 'AS', 'GU', 'VI', 'YA', 'PR', 'DS', 'NL',
+                 'DC')
+FISCAL_EXCLUDED = ('GU', 'VI', 'AS', 'PR', 'DC', 'MP')
+
+# Which columns go with which database. Total expenditure is te11 in the
+# state fiscal table and totalexp in the district one.
+LEVELS = {'state': {'id': 'fipst', 'total_exp': 'te11'},
+          'district': {'id': 'leaid', 'total_exp': 'totalexp'}}
+
+# Default for fetch_frame's cache argument.
+USE_CACHE = False
+
+def connect(db='state'):
+    '''
+    Read only connection to the state or district database (or a path to
+    one).
+    '''
+    path = DB_PATHS.get(db, db)
+    return sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+
+def inflate(amounts, years, to_year=None):
+    '''
+    amounts (each in its year's dollars) in to_year dollars, default the
+    latest year of the bundled CPI-U series. amounts and years are lined up
+    Series or arrays; NaN where the series doesn't cover a year.
+    '''
+    return amounts * inflation_factors(years, to_year).to_numpy()
+
+def _placeholders(values):
+    return ', '.join('?' * len(values))
+
+def _dtype_name(dtype):
+    ''' A dtype (pandas, numpy or pyarrow, or its name) as a string. '''
+    try:
+        return str(pd.api.types.pandas_dtype(dtype))
+    except TypeError:
+        return str(dtype)
+
+def fetch_frame(conn, sql, params=(), dtypes=None, batch_size=100_000,
+                cache=None, arrow=False):
+    '''
+    Run sql with params and return the result as a DataFrame. dtypes
+    (column -> dtype) sets the types of numeric columns, NULLs becoming
+    NaN/NA; other columns (text) get whatever type pandas infers. cache
+    (default USE_CACHE) uses the on-disk result cache.
+
+    arrow=True builds Arrow arrays instead, batch_size rows at a time (see
+    fetch_arrow) and the columns are pandas ArrowDtype columns wrapping
+    them, with no conversion to numpy. dtypes are cast to their Arrow
+    equivalents then (eg. Int64 -> int64[pyarrow]). Needs pyarrow.
+    '''
+    dtypes = dtypes or {}
+
+    def fetch():
+        if arrow:
+            return (fetch_arrow(conn, sql, params, dtypes, batch_size)
+                    .to_pandas(types_mapper=pd.ArrowDtype))
+        return _fetch_rows(conn, sql, params, dtypes)
+
+    if cache is None:
+        cache = USE_CACHE
+    if cache:
+        # The same query comes back with different column types depending on
+        # these, so they're part of the key.
+        options = {'arrow': arrow,
+                   'dtypes': {name: _dtype_name(dtype)
+                              for name, dtype in sorted(dtypes.items())}}
+        return cached_frame(conn, sql, params, fetch, options)
+    return fetch()
+
+def _arrow_type(dtype):
+    '''
+    The pyarrow type for a pandas, numpy or pyarrow dtype (eg. 'Int64' ->
+    int64, 'float64' -> double, str -> string).
+    '''
+    import pyarrow as pa
+
+    if isinstance(dtype, pa.DataType):
+        return dtype
+    dtype = pd.api.types.pandas_dtype(dtype)
+    if isinstance(dtype, pd.ArrowDtype):
+        return dtype.pyarrow_dtype
+    if pd.api.types.is_string_dtype(dtype):
+        return pa.string()
+    return pa.from_numpy_dtype(getattr(dtype, 'numpy_dtype', dtype))
+
+def fetch_arrow(conn, sql, params=(), dtypes=None, batch_size=100_000):
+    '''
+    Run sql with params and return the result as a pyarrow Table. Each batch
+    of rows from the cursor becomes one Arrow array per column (ints, floats,
+    strings and NULLs straight into Arrow buffers, no numpy object arrays in
+    between), and the batches are the Table's chunks, so nothing is copied
+    again to put them together. A column that's all NULL in one batch and
+    ints or floats in another is promoted to the wider type.
+
+    dtypes (column -> dtype, pandas or pyarrow) are cast to at the end, so a
+    column that's empty or all NULL still comes back as the type asked for
+    instead of Arrow's null type.
+    '''
+    import pyarrow as pa
+
+    cursor = conn.execute(sql, params)
+    names = [column[0] for column in cursor.description]
+    types = {name: _arrow_type(dtype)
+             for name, dtype in (dtypes or {}).items() if name in names}
+    tables = []
+
+    while batch := cursor.fetchmany(batch_size):
+        tables.append(pa.Table.from_arrays(
+            [pa.array(column) for column in zip(*batch)], names=names))
+
+    if not tables:
+        return pa.table({name: pa.array([], types.get(name, pa.null()))
+                         for name in names})
+    table = pa.concat_tables(tables, promote_options='permissive')
+
+    for name, arrow_type in types.items():
+        if table.schema.field(name).type != arrow_type:
+            table = table.set_column(names.index(name), name,
+                                     table[name].cast(arrow_type))
+    return table
+
+def _fetch_rows(conn, sql, params, dtypes):
+    cursor = conn.execute(sql, params)
+    frame = pd.DataFrame(cursor.fetchall(),
+                         columns=[column[0] for column in cursor.description])
+    return frame.astype({name: dtype for name, dtype in dtypes.items()
+                         if name in frame.columns})
+
+def naep_scores(conn, grade=8, subject=None, accommodations=None,
+                exclude=NAEP_EXCLUDED):
+    '''
+    Average NAEP scores (end_year, jurisdiction, subject, accommodations,
+    avg_naep) for a grade. subject ('MAT'/'RED') and accommodations
+    ('R2'/'R3') filter if given. Jurisdictions in exclude or starting with X
+    are left out.
+    '''
+    conditions = ['grade = ?', "jurisdiction NOT LIKE 'X%'"]
+    params = [grade]
+    if exclude:
+        conditions.append(f'jurisdiction NOT IN ({_placeholders(exclude)})')
+        params.extend(exclude)
+    if subject is not None:
+        conditions.append('math_read = ?')
+        params.append(subject)
+    if accommodations is not None:
+        conditions.append('accommodations = ?')
+        params.append(accommodations)
+
+    sql = f'''
+        SELECT
+            end_year,
+            jurisdiction,
+            math_read AS subject,
+            accommodations,
+            mean AS avg_naep
+        FROM
+            naep
+        WHERE
+            {' AND '.join(conditions)}
+    '''
+    return fetch_frame(conn, sql, params,
+                       dtypes={'end_year': 'Int64', 'avg_naep': 'float64'})
+
+def per_pupil_spending(conn, level='state', national=False, exclude=(),
+                       real=False):
+    '''
+    Total expenditure per student from fiscal and the enrollment_totals table
+    (membership without adult education). real=True adds exp_per_stu_real,
+    in dollars of the latest year in the database's cpi table.
+
+    For level='state' the rows are (end_year, fipst, stabr, exp_per_stu),
+    with states whose stabr is in exclude left out. For level='district'
+    they're (end_year, leaid, exp_per_stu). national=True instead gives one
+    row per year for all of them together, with stabr 'NT' for the state
+    level, like the notebook's national average.
+    '''
+    id_col = LEVELS[level]['id']
+    total_exp = LEVELS[level]['total_exp']
+
+    if national:
+        columns = ["'NT' AS stabr"] if level == 'state' else []
+        group_by = ['fiscal.end_year']
+    else:
+        columns = [f'fiscal.{id_col}']
+        columns += ['fiscal.stabr'] if level == 'state' else []
+        group_by = ['fiscal.end_year', f'fiscal.{id_col}']
+
+    conditions, params = ['enrollment_totals.total_less_ae > 0'], []
+    if exclude and level == 'state':
+        conditions.append(f'fiscal.stabr NOT IN ({_placeholders(exclude)})')
+        params.extend(exclude)
+
+    exp_per_stu = (f'CAST(SUM(fiscal.{total_exp}) AS REAL)'
+                   ' / SUM(enrollment_totals.total_less_ae)')
+    columns = ['fiscal.end_year'] + columns + [f'{exp_per_stu} AS exp_per_stu']
+    cpi_join = ''
+    if real:
+        # Every row in a group has the same end_year, so the same cpi row.
+        columns.append(f'{exp_per_stu}'
+                       ' * (SELECT cpi_u FROM cpi ORDER BY year DESC LIMIT 1)'
+                       ' / MAX(cpi.cpi_u) AS exp_per_stu_real')
+        cpi_join = 'LEFT JOIN cpi ON cpi.year = fiscal.end_year'
+
+    sql = f'''
+        SELECT
+            {', '.join(columns)}
+        FROM
+            fiscal
+        INNER JOIN
+            enrollment_totals
+            ON fiscal.end_year = enrollment_totals.end_year
+            AND fiscal.{id_col} = enrollment_totals.{id_col}
+        {cpi_join}
+        WHERE
+            {' AND '.join(conditions)}
+        GROUP BY
+            {', '.join(group_by)}
+    '''
+    return fetch_frame(conn, sql, params,
+                       dtypes={'end_year': 'Int64', id_col: 'Int64',
+                               'exp_per_stu': 'float64',
+                               'exp_per_stu_real': 'float64'})
+
+def per_pupil(conn, level='state', ids=None):
+    '''
+    The precomputed per_pupil table (current, instruction and total
+    expenditure per student, nominal and *_real inflation adjusted) for the
+    given fipst/leaid ids or all of them.
+    '''
+    id_col = LEVELS[level]['id']
+
+    where, params = '', []
+    if ids is not None:
+        ids = list(ids)
+        where = f'WHERE {id_col} IN ({_placeholders(ids)})'
+        params = ids
+
+    sql = f'''
+        SELECT *
+        FROM per_pupil
+        {where}
+        ORDER BY {id_col}, end_year
+    '''
+    return fetch_frame(conn, sql, params,
+                       dtypes={'end_year': 'Int64', id_col: 'Int64',
+                               'enrollment': 'Int64',
+                               'current_per_pupil': 'float64',
+                               'instruction_per_pupil': 'float64',
+                               'total_per_pupil': 'float64',
+                               'current_per_pupil_real': 'float64',
+                               'instruction_per_pupil_real': 'float64',
+                               'total_per_pupil_real': 'float64',
+                               'dollars_year': 'Int64'})
+
+def district_membership(conn, years=None, leaids=None, arrow=True):
+    '''
+    Rows of the district membership table (end_year, leaid, the *_id
+    category columns and student_count) for the given years and leaids, or
+    all of them. This is the big one (tens of millions of rows), so it comes
+    back through the Arrow path by default; see the *_cats tables for the
+    category labels.
+    '''
+    conditions, params = [], []
+    for column, values in [('end_year', years), ('leaid', leaids)]:
+        if values is not None:
+            values = list(values)
+            conditions.append(f'{column} IN ({_placeholders(values)})')
+            params.extend(values)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    sql = f'''
+        SELECT
+            end_year,
+            leaid,
+            grade_id,
+            race_ethnicity_id,
+            sex_id,
+            total_indicator_id,
+            student_count
+        FROM
+            membership
+        {where}
+    '''
+    return fetch_frame(conn, sql, params,
+                       dtypes={'end_year': 'Int64', 'leaid': 'Int64',
+                               'grade_id': 'Int64',
+                               'race_ethnicity_id': 'Int64',
+                               'sex_id': 'Int64',
+                               'total_indicator_id': 'Int64',
+                               'student_count': 'Int64'},
+                       arrow=arrow)
+
+def enrollment_series(conn, level='state', ids=None, adult_education=False):
+    '''
+    Students enrolled each year (end_year, fipst or leaid, enrollment) from
+    enrollment_totals, for the given fipst/leaid ids or all of them.
+    adult_education=True counts adult education students too.
+    '''
+    id_col = LEVELS[level]['id']
+    total = 'total' if adult_education else 'total_less_ae'
+
+    where, params = '', []
+    if ids is not None:
+        ids = list(ids)
+        where = f'WHERE {id_col} IN ({_placeholders(ids)})'
+        params = ids
+
+    sql = f'''
+        SELECT
+            end_year,
+            {id_col},
+            {total} AS enrollment
+        FROM
+            enrollment_totals
+        {where}
+        ORDER BY
+            {id_col}, end_year
+    '''
+    return fetch_frame(conn, sql, params,
+                       dtypes={'end_year': 'Int64', id_col: 'Int64',
+                               'enrollment': 'Int64'})
+
+def attach_state_data(conn, path=None):
+    '''
+    Attach state_data.db (the Utah accountability tables) to conn as
+    state_data, read only, if it isn't already. conn has to come from
+    connect() (ATTACH only takes the read only URI on a URI connection).
+    '''
+    path = DB_PATHS['state_data'] if path is None else path
+    attached = [row[1] for row in conn.execute('PRAGMA database_list')]
+    if 'state_data' not in attached:
+        conn.execute('ATTACH DATABASE ? AS state_data',
+                     (f'file:{path}?mode=ro',))
+
+def utah_per_pupil(conn, table='utah_rank'):
+    '''
+    Every row of utah_rank or utah_grades with the district's LEAID and
+    per_pupil spending that year, joined inside sqlite. conn is a district.db
+    connection. Rows whose st_leaid isn't in the crosswalk, or without
+    spending for the year, are left out.
+    '''
+    if table not in ('utah_rank', 'utah_grades'):
+        raise ValueError(f"table must be 'utah_rank' or 'utah_grades', "
+                         f"not {table}")
+    attach_state_data(conn)
+
+    sql = f'''
+        SELECT
+            utah.*,
+            utah_leaid.leaid,
+            per_pupil.enrollment,
+            per_pupil.current_per_pupil,
+            per_pupil.instruction_per_pupil,
+            per_pupil.total_per_pupil,
+            per_pupil.current_per_pupil_real,
+            per_pupil.instruction_per_pupil_real,
+            per_pupil.total_per_pupil_real,
+            per_pupil.dollars_year
+        FROM
+            state_data.{table} AS utah
+            INNER JOIN state_data.utah_leaid AS utah_leaid
+                ON utah_leaid.st_leaid = utah.st_leaid
+            INNER JOIN per_pupil
+                ON per_pupil.end_year = utah.end_year
+                AND per_pupil.leaid = utah_leaid.leaid
+        ORDER BY
+            utah.end_year, utah.st_leaid, utah.st_school_number
+    '''
+    # The cache is keyed on district.db's build id, which doesn't change
+    # when state_data.db is reloaded.
+    return fetch_frame(conn, sql, cache=False,
+                       dtypes={'end_year': 'Int64', 'leaid': 'Int64',
+                               'st_school_number': 'Int64',
+                               'enrollment': 'Int64',
+                               'current_per_pupil': 'float64',
+                               'instruction_per_pupil': 'float64',
+                               'total_per_pupil': 'float64',
+                               'current_per_pupil_real': 'float64',
+                               'instruction_per_pupil_real': 'float64',
+                               'total_per_pupil_real': 'float64',
+                               'dollars_year': 'Int64'})
@@ -0,0 +1,58 @@
+'''
+Negative value ("sentinel") cleaning for the wide CCD tables.
+
+The CCD uses negative numbers as codes instead of values: -1 is missing, -2 is
+not applicable, and the odd -3, -1000, etc. look like typos. All of them
+should be NA in the database. The old way,
+
+    frame[num_cols] = frame[num_cols].where(frame[num_cols] >= 0, pd.NA)
+
+copies the whole frame a few times, which hurts on the ~390 column fiscal
+tables. mask_negative_sentinels goes one column at a time and only writes to
+the rows that are negative, so columns with no sentinels aren't touched.
+'''
+
+import numpy as np
+import pandas as pd
+
+# Codes for the optional flag array.
+SENTINEL_CODES = {0: 'value', 1: 'missing (-1)', 2: 'not applicable (-2)',
+                  3: 'other negative'}
+
+def mask_negative_sentinels(frame, columns=None, flags=False):
+    '''
+    Set negative values in the numeric columns of frame to NA, in place.
+    columns defaults to every numeric column. Plain integer columns can't
+    hold NA, so those with negatives are made the nullable type of the same
+    width (int32 -> Int32), rather than float. The rest are left alone.
+
+    If flags=True, returns an int8 DataFrame (same index as frame) with a
+    column for each column that had negatives, coded as in SENTINEL_CODES.
+    Otherwise returns None.
+    '''
+    if columns is None:
+        columns = frame.select_dtypes(include='number').columns
+
+    flag_cols = {}
+    for col in columns:
+        negative = frame[col].lt(0).to_numpy(dtype=bool, na_value=False)
+        if not negative.any():
+            continue
+
+        if flags:
+            codes = np.zeros(len(frame), dtype=np.int8)
+            values = frame[col].to_numpy()[negative]
+            codes[negative] = np.select([values == -1, values == -2],
+                                        [1, 2], default=3)
+            flag_cols[col] = codes
+
+        # Same width, nullable: int32 -> Int32, uint8 -> UInt8.
+        dtype = frame[col].dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+            nullable = {'i': 'Int', 'u': 'UInt'}[dtype.kind]
+            frame[col] = frame[col].astype(f'{nullable}{dtype.itemsize * 8}')
+        frame.loc[negative, col] = pd.NA
+
+    if flags:
+        return pd.DataFrame(flag_cols, index=frame.index)
+    return None
@@ -10,6 +10,9 @@ Four tables:
 - directory
 - membership
 - fiscal
+
+No indexes are made here. Run state_db_indexes.py after the prep scripts
+have loaded the data.
 '''
 
 # %%
@@ -0,0 +1,26 @@
+'''
+Creates the indexes in state_indexes.sql on data/state.db.
+
+Run this after state_db_creation.py and all the state_*_prep.py scripts
+(only state_db_optimize.py comes after it). The tables are loaded without
+indexes so every insert doesn't also have to update them, and sqlite builds
+each index here in one sorted pass. The script ends with ANALYZE so the
+query planner has statistics to pick between the indexes with.
+'''
+
+# %%
+
+import sqlite3
+
+conn = sqlite3.connect('data/state.db')
+cursor = conn.cursor()
+
+with open('state_indexes.sql', 'r', encoding="utf-8") as sql_file:
+    sql_script = sql_file.read()
+
+cursor.executescript(sql_script)
+conn.commit()
+
+conn.close()
+
+# %%
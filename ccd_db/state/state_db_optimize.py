@@ -0,0 +1,42 @@
+'''
+Compacts data/state.db once everything is loaded and indexed: bigger pages
+for the wide fiscal table, fresh ANALYZE statistics and a VACUUM into a new
+file (see ccd_db/optimize.py). Prints the size and query time changes.
+
+Run this last, after state_db_indexes.py.
+'''
+
+# %%
+
+import sys
+
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.optimize import optimize_db
+
+# The NAEP and spending per student queries from state_level_eda.ipynb.
+QUERIES = {
+    'naep, grade 8': '''
+        SELECT end_year, jurisdiction, math_read, accommodations, mean
+        FROM naep
+        WHERE grade = 8
+    ''',
+    'spending per student': '''
+        SELECT fiscal.end_year,
+               fiscal.te11 / membership.student_count,
+               fiscal.stabr
+        FROM fiscal
+        INNER JOIN membership
+            ON fiscal.end_year = membership.end_year
+            AND fiscal.fipst = membership.fipst
+        WHERE membership.total_indicator =
+            'Derived - Education Unit Total minus Adult Education Count'
+    ''',
+    'fiscal, every column': '''
+        SELECT *
+        FROM fiscal
+    '''
+}
+
+optimize_db('data/state.db', QUERIES)
+
+# %%
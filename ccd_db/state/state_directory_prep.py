@@ -7,10 +7,19 @@ and then to concat that with the prepped columns from whole dataframe (2014
 and earlier). And then write the final dataframe to a SQLITE database.
 '''
 #%%
-import sqlite3
+import sys
 import pandas as pd
 
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.bulk_load import connect, replace_partitions, select_years
+from ccd_db.jurisdictions import load_jurisdictions
+
 PRE_PATH = "data/nonfiscal/directory/directory_"
+
+# Years to (re)load into the database, eg. [2024] when a new CCD release comes
+# out. None loads every year. Years that aren't loaded are left alone.
+LOAD_YEARS = None
+
 files = {year: [f'{PRE_PATH}{year}.csv', '', ',', {}]
          for year in range(2015, 2025)}
 
@@ -29,7 +38,7 @@ dir_2015 = (
     .reset_index(level='end_year')
 )
 dir_1987 = (
-    pd.read_csv("data/nonfiscal/directory/directory_through_2014.csv")
+    pd.read_parquet("data/nonfiscal/directory/directory_through_2014.parquet")
 )
 directory = pd.concat([dir_2015, dir_1987], ignore_index=True)
 
@@ -80,21 +89,16 @@ directory = directory.rename(columns=str.lower)
 # Write the directory table to the database
 ###############################################################################
 
-# Make a mapping from python/pandas dtypes to SQLITE dtypes
-type_map = {'object': 'TEXT',
-            'int64': 'INTEGER',
-            'Int64': 'INTEGER'}
-col_dtypes = directory.dtypes.map(lambda x: type_map.get(str(x)))
-
 # Creates a new database file if it doesn't exist
-conn = sqlite3.connect('data/state.db')
+conn = connect('data/state.db')
 cursor = conn.cursor()
 
-directory.to_sql('directory',
-                 con=conn,
-                 if_exists='replace',
-                 index=False,
-                 dtype=col_dtypes.to_dict())
+replace_partitions(conn,
+                   {'directory': select_years(directory, LOAD_YEARS)},
+                   'state_directory_prep.py')
+
+# FIPS codes, abbreviations and names for the states and territories.
+load_jurisdictions(conn)
 
 conn.close()
 
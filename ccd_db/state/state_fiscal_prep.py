@@ -5,11 +5,20 @@ Feb 9, 2025
 Script to organize fiscal data from state level CCD datasets.
 '''
 #%%
-import sqlite3
+import sys
 import os
 import pandas as pd
 
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.sentinels import mask_negative_sentinels
+from ccd_db.bulk_load import connect, replace_partitions, select_years
+
 PRE_PATH = ""
+
+# Years to (re)load into the database, eg. [2024] when a new CCD release comes
+# out. None loads every year. Years that aren't loaded are left alone.
+LOAD_YEARS = None
+
 PRE_PATH_DATA = PRE_PATH + "data/fiscal/fiscal_"
 
 #%%
@@ -139,9 +148,7 @@ numeric_cols = fiscal.select_dtypes(include='number', exclude=int)
 fiscal = fiscal.astype({col: 'Int64' for col in numeric_cols})
 
 # Replace negative values with pd.NA
-fiscal[fiscal.select_dtypes('number').columns] = (
-    fiscal.select_dtypes('number').where(lambda x: x >= 0, pd.NA)
-)
+mask_negative_sentinels(fiscal)
 
 fiscal.columns = fiscal.columns.str.lower()
 # fiscal = fiscal.rename(dict(zip(fiscal.columns, fiscal.columns.str.lower())))
@@ -172,17 +179,11 @@ col_dtypes = fiscal.dtypes.map(lambda x: type_map.get(str(x)))
 
 #%%
 # Creates a new database file if it doesn't exist
-conn = sqlite3.connect(PRE_PATH + 'data/state.db')
+conn = connect(PRE_PATH + 'data/state.db')
 cursor = conn.cursor()
 
-(fiscal
-#  .rename(dict(zip(fiscal.columns, fiscal.columns.str.lower())))
- .to_sql('fiscal',
-         con=conn,
-         if_exists='append',
-         index=False,
-         dtype=col_dtypes.to_dict())
-)
+replace_partitions(conn, {'fiscal': select_years(fiscal, LOAD_YEARS)},
+                   'state_fiscal_prep.py')
 
 conn.close()
 
@@ -0,0 +1,36 @@
+/*
+Indexes for state.db. Run by state_db_indexes.py after all the tables are
+loaded (building an index over a full table is a lot faster than keeping it
+up to date through millions of inserts).
+*/
+
+-- Indexes to speed up common queries
+CREATE INDEX IF NOT EXISTS idx_membership_end_year_fipst
+    ON membership (end_year, fipst);
+
+/*
+Covering indexes for the queries in state_level_eda.ipynb. Each one leads
+with the columns the notebook filters on with = and then has every other
+column the query reads, so sqlite never has to go to the table itself
+(the fiscal rows are ~400 columns wide). See
+../benchmarks/notebook_query_benchmark.py.
+*/
+
+-- naep WHERE grade = 8 [AND accommodations = 'R3' [AND math_read = ...]]
+CREATE INDEX IF NOT EXISTS idx_naep_grade_accommodations_subject
+    ON naep (grade, accommodations, math_read, jurisdiction, end_year, mean);
+
+-- membership WHERE total_indicator = ..., then joined to fiscal on
+-- (end_year, fipst). Replaces the plain total_indicator index.
+DROP INDEX IF EXISTS idx_membership_total_indicator;
+CREATE INDEX IF NOT EXISTS idx_membership_indicator_year_fipst
+    ON membership (total_indicator, end_year, fipst, student_count);
+
+-- fiscal looked up by (end_year, fipst) for the total expenditure per
+-- student. Replaces the plain (end_year, fipst) index.
+DROP INDEX IF EXISTS idx_fiscal_end_year_fipst;
+CREATE INDEX IF NOT EXISTS idx_fiscal_end_year_fipst_te11
+    ON fiscal (end_year, fipst, stabr, te11);
+
+-- Table and index statistics for the query planner.
+ANALYZE;
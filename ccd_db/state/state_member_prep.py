@@ -28,11 +28,19 @@ pre_membership[year]['STUDENT_COUNT'] = \
 
 # %%
 import re
-import sqlite3
+import sys
 import pandas as pd
-import numpy as np # just for a few np.where uses
+
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.sentinels import mask_negative_sentinels
+from ccd_db.bulk_load import connect, replace_partitions, select_years
 
 PRE_PATH = "data/nonfiscal/membership/membership_"
+
+# Years to (re)load into the database, eg. [2024] when a new CCD release comes
+# out. None loads every year. Years that aren't loaded are left alone.
+LOAD_YEARS = None
+
 files = {year: [f'{PRE_PATH}{year}.csv', '', ',', {}]
          for year in range(2015, 2025)}
 
@@ -60,22 +68,18 @@ for year in range(2015, 2025):
 # Put together wide format years.
 ###############################################################################
 # add files/years from 1987 to 2014
-membership_wide = pd.read_csv('data/nonfiscal/membership/' + \
-                              'membership_through_2014.csv',
-                              na_values=['N', 'M', -1, -2])
+membership_wide = pd.read_parquet('data/nonfiscal/membership/' + \
+                                  'membership_through_2014.parquet')
 
 # Adding end_year=2015 and 2016 because they're in wide format.
 membership_wide = pd.concat([membership_wide,
                              pre_membership[2015],
                              pre_membership[2016]])
 
-# Replace negative numbers with np.nan and make columns Int64
+# Replace negative numbers with NA and make columns Int64
 num_cols = membership_wide.select_dtypes(include='float').columns
-membership_wide[num_cols] = (
-    membership_wide[num_cols]
-    .where(membership_wide[num_cols] >= 0, np.nan)
-    .astype('Int64')
-)
+mask_negative_sentinels(membership_wide, num_cols)
+membership_wide = membership_wide.astype({col: 'Int64' for col in num_cols})
 
 # Drop columns we don't need anymore.
 membership_wide = membership_wide.drop(
@@ -214,22 +218,42 @@ membership = membership.rename(columns=str.lower)
 # Write the membership table to the database
 ############################################################################
 
-# Make a mapping from python/pandas dtypes to SQLITE dtypes
-type_map = {'object': 'TEXT',
-            'int64': 'INTEGER',
-            'Int64': 'INTEGER',
-            'float': 'REAL'}
-col_dtypes = membership.dtypes.map(lambda x: type_map.get(str(x)))
-
 # Connect to database and append to created table.
-conn = sqlite3.connect('data/state.db')
+conn = connect('data/state.db')
 cursor = conn.cursor()
 
-membership.to_sql('membership',
-              con=conn,
-              if_exists='append',
-              index=False,
-              dtype=col_dtypes.to_dict())
+membership = select_years(membership, LOAD_YEARS)
+replace_partitions(conn, {'membership': membership}, 'state_member_prep.py')
+
+# Materialize the total enrollment for each (end_year, fipst). Pretty much
+# every query against membership only wants one of these two numbers. Only
+# the years that were just loaded are redone.
+loaded_years = ', '.join(str(year) for year in membership['end_year'].unique())
+cursor.execute(
+    f'DELETE FROM enrollment_totals WHERE end_year IN ({loaded_years})'
+)
+cursor.execute(f'''
+    INSERT INTO enrollment_totals
+    SELECT
+        end_year,
+        fipst,
+        SUM(CASE WHEN total_indicator = 'Education Unit Total'
+            THEN student_count END) AS total,
+        SUM(CASE WHEN total_indicator = 'Derived - Education Unit Total ' ||
+                                        'minus Adult Education Count'
+            THEN student_count END) AS total_less_ae
+    FROM
+        membership
+    WHERE
+        end_year IN ({loaded_years})
+        AND total_indicator IN ('Education Unit Total',
+                                'Derived - Education Unit Total minus ' ||
+                                'Adult Education Count')
+    GROUP BY
+        end_year, fipst
+    ;
+''')
+conn.commit()
 
 conn.close()
 
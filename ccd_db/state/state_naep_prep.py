@@ -6,13 +6,21 @@ Script to download and organize NAEP data for all states.
 API documentation: https://www.nationsreportcard.gov/api_documentation.aspx
 '''
 #%%
-import sqlite3
+import sys
 from itertools import product
 import json
 import pandas as pd
 import requests as rq
 
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.bulk_load import connect, replace_partitions, select_years
+
 PRE_PATH = ""
+
+# Years to (re)load into the database, eg. [2024] when a new CCD release comes
+# out. None loads every year. Years that aren't loaded are left alone.
+LOAD_YEARS = None
+
 PRE_PATH_DATA = PRE_PATH + "data/fiscal/fiscal_"
 
 #%%
@@ -152,22 +160,12 @@ naep = naep.rename(columns={'year': 'end_year',
 # Write the NAEP table to the database
 ###############################################################################
 
-# Make a mapping from python/pandas dtypes to SQLITE dtypes
-type_map = {'object': 'TEXT',
-            'int64': 'INTEGER',
-            'Int64': 'INTEGER',
-            'float64': 'REAL'}
-col_dtypes = naep.dtypes.map(lambda x: type_map.get(str(x)))
-
 # Connect to database and append to created table.
-conn = sqlite3.connect('data/state.db')
+conn = connect('data/state.db')
 cursor = conn.cursor()
 
-naep.to_sql('naep',
-            con=conn,
-            if_exists='append',
-            index=False,
-            dtype=col_dtypes.to_dict())
+replace_partitions(conn, {'naep': select_years(naep, LOAD_YEARS)},
+                   'state_naep_prep.py')
 
 conn.close()
 
@@ -0,0 +1,53 @@
+'''
+Fills the per_pupil table in data/state.db: current, instruction and total
+expenditure per student each year, nominal and adjusted for inflation (see
+ccd_db/per_pupil.py).
+
+Run after state_fiscal_prep.py and state_member_prep.py (which fills
+enrollment_totals).
+
+Which NPEFS columns to use is a judgement call. te11 is what the notebook has
+always divided by enrollment and is kept as "total" so the numbers line up,
+though fiscal_var_crosswalk.csv calls it TOTAL CURRENT EXPENDITURES. te5 is
+used for current expenditure on elementary/secondary education and ste1 for
+total current expenditure on instruction.
+'''
+#%%
+import sys
+import pandas as pd
+
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.bulk_load import connect, replace_partitions
+from ccd_db.inflation import load_cpi
+from ccd_db.per_pupil import per_pupil_table
+
+MEASURES = {'current': 'te5', 'instruction': 'ste1', 'total': 'te11'}
+
+conn = connect('data/state.db')
+
+# The CPI-U series the *_real columns use, for adjusting anything else in SQL.
+load_cpi(conn)
+
+spending = pd.read_sql('''
+    SELECT
+        fiscal.end_year,
+        fiscal.fipst,
+        enrollment_totals.total_less_ae AS enrollment,
+        fiscal.te5,
+        fiscal.ste1,
+        fiscal.te11
+    FROM
+        fiscal
+    INNER JOIN
+        enrollment_totals
+        ON fiscal.end_year = enrollment_totals.end_year
+        AND fiscal.fipst = enrollment_totals.fipst
+''', conn)
+
+replace_partitions(conn,
+                   {'per_pupil': per_pupil_table(spending, 'fipst', MEASURES)},
+                   'state_per_pupil_prep.py')
+
+conn.close()
+
+# %%
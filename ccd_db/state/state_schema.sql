@@ -131,6 +131,17 @@ CREATE TABLE membership (
     dms_flag TEXT
 );
 
+-- Total enrollment per state and year, with and without adult education.
+-- Materialized from membership by state_member_prep.py so the usual totals
+-- lookup is a primary key read instead of a membership scan.
+CREATE TABLE enrollment_totals (
+    end_year INTEGER,
+    fipst INTEGER,
+    total INTEGER,
+    total_less_ae INTEGER,
+    PRIMARY KEY (end_year, fipst)
+);
+
 -- Fiscal information
 CREATE TABLE fiscal (
     end_year INTEGER,
@@ -581,7 +592,63 @@ CREATE TABLE fiscal (
     iae4g TEXT
 );
 
--- Indexes to speed up common queries
--- CREATE INDEX idx_membership_end_year_leaid ON membership (end_year, leaid);
--- CREATE INDEX idx_fiscal_end_year_leaid ON fiscal (end_year, leaid);
--- CREATE INDEX idx_membership_total_indicator ON membership (total_indicator);
+-- States and territories with their FIPS code, abbreviation, name and NAEP
+-- jurisdiction code (ccd_db/jurisdictions.csv), loaded by
+-- state_directory_prep.py. load_jurisdictions also makes its unique st and
+-- naep_code indexes.
+CREATE TABLE jurisdiction (
+    fipst INTEGER PRIMARY KEY,
+    st TEXT,
+    name TEXT,
+    naep_code TEXT
+);
+
+-- CPI-U annual averages (ccd_db/cpi_u_annual.csv), loaded by
+-- state_per_pupil_prep.py. version says which series and years it is.
+CREATE TABLE cpi (
+    year INTEGER PRIMARY KEY,
+    cpi_u REAL,
+    version TEXT
+);
+
+-- Spending per student, worked out from fiscal and enrollment_totals
+-- (membership without adult education) by state_per_pupil_prep.py. The
+-- *_real columns are in dollars_year dollars (CPI-U), NULL for years the CPI
+-- doesn't cover yet.
+CREATE TABLE per_pupil (
+    end_year INTEGER,
+    fipst INTEGER,
+    enrollment INTEGER,
+    current_per_pupil REAL,
+    instruction_per_pupil REAL,
+    total_per_pupil REAL,
+    current_per_pupil_real REAL,
+    instruction_per_pupil_real REAL,
+    total_per_pupil_real REAL,
+    dollars_year INTEGER,
+    PRIMARY KEY (end_year, fipst)
+);
+
+-- When each (table, end_year) was last loaded and by which script. Written by
+-- replace_partitions in ccd_db/bulk_load.py.
+CREATE TABLE load_log (
+    table_name TEXT,
+    end_year INTEGER,
+    row_count INTEGER,
+    source TEXT,
+    loaded_at TEXT,
+    PRIMARY KEY (table_name, end_year)
+);
+
+-- The id of the latest load, a new one every time replace_partitions (or
+-- replace_table) runs. Cached query results (ccd_db/cache.py) are keyed on
+-- it, so they go stale as soon as the data changes.
+CREATE TABLE build_info (
+    build_id TEXT,
+    source TEXT,
+    built_at TEXT
+);
+
+-- Indexes are in state_indexes.sql. They're created by state_db_indexes.py
+-- once all the prep scripts have loaded their data, so the inserts don't have
+-- to keep the index B-trees up to date row by row.
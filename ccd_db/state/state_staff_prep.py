@@ -7,11 +7,19 @@ and then to concat that with the prepped columns from whole dataframe (2014
 and earlier). Then write the final dataframe to a sqlite database.
 '''
 #%%
-import sqlite3
+import sys
 import pandas as pd
 import numpy as np
 
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.bulk_load import connect, replace_partitions, select_years
+
 PRE_PATH = "data/nonfiscal/staff/staff_"
+
+# Years to (re)load into the database, eg. [2024] when a new CCD release comes
+# out. None loads every year. Years that aren't loaded are left alone.
+LOAD_YEARS = None
+
 files = {year: [f'{PRE_PATH}{year}.csv', '', ',', {}]
          for year in range(2015, 2025)}
 
@@ -105,8 +113,8 @@ staff = staff.assign(
 
 # Concat with 2014 and earlier data
 staff = pd.concat([staff,
-                   pd.read_csv("data/nonfiscal/staff/staff_through_2014.csv",
-                               na_values=['M', 'N', '.'])
+                   pd.read_parquet(
+                       "data/nonfiscal/staff/staff_through_2014.parquet")
                    ],
                   ignore_index=True)
 
@@ -118,22 +126,12 @@ staff = staff.rename(columns=str.lower)
 # Write the staff table to the database
 ###############################################################################
 
-# Make a mapping from python/pandas dtypes to SQLITE dtypes
-type_map = {'object': 'TEXT',
-            'int64': 'INTEGER',
-            'Int64': 'INTEGER',
-            'float64': 'REAL'}
-col_dtypes = staff.dtypes.map(lambda x: type_map.get(str(x)))
-
 # Connect to database and append to created table.
-conn = sqlite3.connect('data/state.db')
+conn = connect('data/state.db')
 cursor = conn.cursor()
 
-staff.to_sql('staff',
-              con=conn,
-              if_exists='append',
-              index=False,
-              dtype=col_dtypes.to_dict())
+replace_partitions(conn, {'staff': select_years(staff, LOAD_YEARS)},
+                   'state_staff_prep.py')
 
 conn.close()
 
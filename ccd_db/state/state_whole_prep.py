@@ -18,8 +18,12 @@ truncated to "BUREAU OF INDIAN EDUCATIO".
 '''
 #%%
 
+import sys
 import pandas as pd
 
+sys.path.append('../..')  # repo root, for the shared ccd_db modules
+from ccd_db.handoff import write_intermediate
+
 ###############################################################################
 # Import end_years = 2008-2014
 ###############################################################################
@@ -249,9 +253,8 @@ membership_cols = ['end_year', 'FIPST'] + \
 
 # Then something like the following:
 # directory_cols_we_want = [x for x in directory_cols if x in whole.columns]
-whole[directory_cols].to_csv(
-    'data/nonfiscal/directory/directory_through_2014.csv',
-    index=False)
+write_intermediate(whole[directory_cols],
+                   'data/nonfiscal/directory/directory_through_2014.parquet')
 
 # %%
 ###############################################################################
@@ -276,9 +279,9 @@ whole[directory_cols].to_csv(
 
 # # Then something like the following:
 # staff_cols_we_want = [x for x in staff_cols if x in whole.columns]
-whole[staff_cols].to_csv(
-    'data/nonfiscal/staff/staff_through_2014.csv',
-    index=False)
+write_intermediate(whole[staff_cols],
+                   'data/nonfiscal/staff/staff_through_2014.parquet',
+                   na_values=['M', 'N', '.'])
 
 #%%
 ###############################################################################
@@ -306,8 +309,8 @@ whole[staff_cols].to_csv(
 
 # Then something like the following:
 # membership_cols_we_want = [x for x in membership_cols if x in whole.columns]
-whole[membership_cols].to_csv(
-    'data/nonfiscal/membership/membership_through_2014.csv',
-    index=False)
+write_intermediate(whole[membership_cols],
+                   'data/nonfiscal/membership/membership_through_2014.parquet',
+                   na_values=['N', 'M', -1, -2])
 
 # %%
@@ -15,12 +15,20 @@ PDF summary for end_year=2013 (labeled 2012 for 2012-2013 school year):
 
 '''
 #%%
+import sys
 import pandas as pd
 
+sys.path.append('..')  # state_data/utah, for workbooks.py and utah_db.py
+sys.path.append('../../..')  # repo root, for the shared ccd_db modules
+from workbooks import read_workbooks
+from utah_db import load_utah
+from ccd_db.name_match import canonical_names
+
+# Parsed once, then read from .workbook_cache (see workbooks.py)
 FILE_PREFIX = "AccountabilitySchoolGrades"
-pre_grades = {year: pd.read_excel(FILE_PREFIX + str(year-1) + ".xlsx",
-                                  header=1)
-              for year in range(2013, 2018)}
+pre_grades = read_workbooks({year: FILE_PREFIX + str(year-1) + ".xlsx"
+                             for year in range(2013, 2018)},
+                            header=1)
 
 # make attribute names consistent
 renames = {
@@ -67,6 +75,8 @@ grades['school_type'] = grades['school_type'] \
 grades['lea_name'] = grades['lea_name'].str.upper()
 grades['school_name'] = grades['school_name'].str.upper()
 
+# The ids below are looked up by name, so only these (checked by hand) are
+# renamed before then.
 labels = {
     'ACADEMY FOR MATH ENGINEERING & SCIENCE (AMES)':
         'ACADEMY FOR MATH ENGINEERING & SCIENCE',
@@ -81,40 +91,38 @@ labels = {
     'UTAH COUNTY ACADEMY OF SCIENCE (UCAS)':
         'UTAH COUNTY ACADEMY OF SCIENCE'
 }
-
-for old, new in labels.items():
-    grades.loc[grades['lea_name'] == old, 'lea_name'] = new
+grades['lea_name'] = grades['lea_name'].replace(labels)
 
 # Need to fill in the missing values for st_lea_number and st_number for
 # later merging grades with CCD data.
 
-lea_names_to_ids = (
-    grades
-    .dropna(subset='st_lea_number')
-    .set_index(['lea_name', 'school_name'])
-    .loc[:, 'st_lea_number']
-    .to_dict()
-)
-grades['st_lea_number'] = (
-    grades
-    .apply(lambda row: lea_names_to_ids.get((row['lea_name'],
-                                         row['school_name'])),
-           axis=1)
-)
-
-school_names_to_ids = (
-    grades
-    .dropna(subset='st_school_number')
-    .set_index(['lea_name', 'school_name'])
-    .loc[:, 'st_school_number']
-    .to_dict()
-)
+def ids_by_name(frame, column):
+    '''
+    column for every row of frame, looked up by (lea_name, school_name) from
+    the rows that have it (the last one wins if a name pair has several).
+    '''
+    names = ['lea_name', 'school_name']
+    known = (
+        frame
+        .dropna(subset=column)
+        .drop_duplicates(subset=names, keep='last')
+        .set_index(names)
+        .loc[:, column]
+    )
+    keys = pd.MultiIndex.from_frame(frame[names])
+    return pd.Series(known.reindex(keys).to_numpy(), index=frame.index)
+
+grades['st_lea_number'] = ids_by_name(grades, 'st_lea_number')
 grades['st_school_number'] = (
-    grades
-    .apply(lambda row: school_names_to_ids.get((row['lea_name'],
-                                         row['school_name'])),
-           axis=1)
-    .astype('Int64')
+    ids_by_name(grades, 'st_school_number').astype('Int64')
 )
 
-grades.to_csv("grades.csv", index=False)
+# Then LEA names spelled differently in different years (eg. 'KARL G
+# MAESER' and 'KARL G. MAESER') get the latest year's spelling, within
+# each LEA.
+grades['lea_name'] = canonical_names(grades['lea_name'], grades['end_year'],
+                                     grades['st_lea_number'])
+
+# Load into state_data.db (see ../utah_db.py)
+load_utah(grades.rename(columns={'st_lea_number': 'st_leaid'}),
+          'utah_grades', 'grades_prep.py')
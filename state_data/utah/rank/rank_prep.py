@@ -25,8 +25,15 @@ changes. Eg. 'REAL SALT LAKE ACADEMY HIGH SCHOOL' and "UTAH ARTS ACADEMY OLD'
 '''
 
 #%%
+import sys
 import pandas as pd
 
+sys.path.append('..')  # state_data/utah, for workbooks.py and utah_db.py
+sys.path.append('../../..')  # repo root, for the shared ccd_db modules
+from workbooks import read_workbooks
+from utah_db import load_utah
+from ccd_db.name_match import canonical_names
+
 # Unfortunately, file names are inconsistent.
 FILE_NAMES = {2024: '23_RankList.xlsx',
               2023: 'Accountability2022RankList.xlsx',
@@ -36,12 +43,8 @@ FILE_NAMES = {2024: '23_RankList.xlsx',
               2017: 'AccountabilityRankList2016.xlsx'}
 
 # Unfortunately, some files have multiple sheets. Only last sheet in desired.
-pre_rank = {year: pd.read_excel(file_name,
-                                sheet_name=(
-                                    pd.ExcelFile(file_name).
-                                    sheet_names[-1]
-                                ))
-            for year, file_name in FILE_NAMES.items()}
+# Parsed once, then read from .workbook_cache (see workbooks.py)
+pre_rank = read_workbooks(FILE_NAMES, sheet=-1)
 
 # Combine year-specific dataframes together into one: rank
 rank = (
@@ -81,11 +84,13 @@ rank = rank.drop(columns=['PERCENT Ranking',
                           'PERCENT Ranking2',
                           'Percent RANKING'])
 
-# Make text attributes uppercase and remove erroneous commas
-rank['lea_name'] = rank['lea_name'].str.upper()
-rank['lea_name'] = rank['lea_name'].str.replace(',', '')
-rank['school_name'] = rank['school_name'].str.upper()
-rank['school_name'] = rank['school_name'].str.replace(',', '')
+# Make text attributes uppercase and remove erroneous commas, then give names
+# spelled differently in different years (punctuation, abbreviations) the
+# latest year's spelling, within each LEA so schools in different districts
+# aren't merged.
+for col in ['lea_name', 'school_name']:
+    rank[col] = rank[col].str.upper().str.replace(',', '')
+    rank[col] = canonical_names(rank[col], rank['end_year'], rank['st_leaid'])
 
 # Columns to become float
 columns_to_make_numeric =[
@@ -117,5 +122,5 @@ rank['PSReadinessRating'] = (
     .astype('Int64')
 )
 
-# Write to csv
-rank.to_csv("rank.csv", index=False)
+# Load into state_data.db (see ../utah_db.py)
+load_utah(rank, 'utah_rank', 'rank_prep.py')
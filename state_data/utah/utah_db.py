@@ -0,0 +1,180 @@
+'''
+Loading the Utah accountability data into state_data/state_data.db.
+
+grades_prep.py and rank_prep.py load their tables (utah_grades and
+utah_rank) here instead of writing csvs. state_data.db is kept apart from the
+CCD databases so the Utah scripts don't need ccd_db/build.py to have run, and
+it's attached to district.db to join the two inside sqlite (see
+ccd_db/query.py, utah_per_pupil):
+
+    ATTACH 'state_data/state_data.db' AS state_data;
+
+Both tables are indexed on (end_year, st_leaid, st_school_number). Column
+names are made lower case with underscores (eg. 'Bottom 5% Flag' ->
+bottom_5_flag). utah_leaid maps each Utah st_leaid to the CCD LEAID through
+district.db's leaid_crosswalk (by id, or failing that by name), so a query
+goes utah_rank -> utah_leaid -> per_pupil with primary key lookups. The
+ids found by name carry the CCD name and score they matched on.
+'''
+
+import os
+import re
+import sqlite3
+import pandas as pd
+from ccd_db.bulk_load import (connect, build_transaction, insert_rows,
+                              stamp_build)
+from ccd_db.crosswalk import resolve_leaid
+from ccd_db.name_match import match_names
+from ccd_db.query import DB_PATHS
+
+STATE_DATA_DB = DB_PATHS['state_data']
+UTAH_FIPST = 49
+KEYS = ['end_year', 'st_leaid', 'st_school_number']
+
+def column_name(name):
+    ''' Lower case with underscores, eg. 'Bottom 5% Flag' -> bottom_5_flag. '''
+    return re.sub(r'[^a-z0-9]+', '_', str(name).lower()).strip('_')
+
+def sqlite_type(dtype):
+    ''' Column type for a pandas dtype. '''
+    if pd.api.types.is_bool_dtype(dtype) or \
+            pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+def st_leaid_text(values):
+    '''
+    The state LEA ids as text, without the '.0' a float column would give
+    them (eg. 1.0 -> '1'), so every table has them the same way.
+    '''
+    numbers = pd.to_numeric(values, errors='coerce')
+    text = values.astype('string').str.strip().str.upper()
+    return text.mask(numbers.notna(), numbers.astype('Int64').astype('string'))
+
+def load_table(conn, frame, table, source):
+    '''
+    Replace table with frame (all of it, these are small) and index it on
+    KEYS. frame needs the KEYS columns.
+    '''
+    frame = frame.rename(columns=column_name)
+    duplicated = frame.columns[frame.columns.duplicated()]
+    if len(duplicated):
+        raise ValueError(f'columns {list(duplicated)} clash once renamed')
+
+    frame['st_leaid'] = st_leaid_text(frame['st_leaid'])
+    frame['st_school_number'] = (
+        pd.to_numeric(frame['st_school_number']).astype('Int64')
+    )
+    for col in frame.select_dtypes(['datetime', 'datetimetz']).columns:
+        frame[col] = frame[col].dt.strftime('%Y-%m-%d %H:%M:%S')
+
+    columns = ', '.join(f'"{col}" {sqlite_type(frame[col].dtype)}'
+                        for col in frame.columns)
+
+    with build_transaction(conn):
+        conn.execute(f'DROP TABLE IF EXISTS {table}')
+        conn.execute(f'CREATE TABLE {table} ({columns})')
+        insert_rows(conn, frame, table)
+        conn.execute(f'''
+            CREATE INDEX idx_{table}_keys
+            ON {table} ({', '.join(KEYS)})
+        ''')
+        stamp_build(conn, source)
+
+def load_leaid_crosswalk(conn, district_db=DB_PATHS['district'],
+                         min_score=0.85):
+    '''
+    Rebuild utah_leaid (st_leaid -> leaid) for every st_leaid in utah_grades
+    and utah_rank, looked up in district.db's leaid_crosswalk: by ST_LEAID,
+    and for the ids that aren't there, by matching their LEA name to the
+    crosswalk's names (see ccd_db/name_match.py). Name matches need a score
+    of at least min_score, are printed, and keep the CCD name they matched
+    and the score in matched_name and match_score (NULL for id matches) so
+    they can be checked. Skipped with a note if district.db hasn't been
+    built yet.
+    '''
+    if not os.path.exists(district_db):
+        print(f'{district_db} not found, utah_leaid not updated')
+        return
+
+    tables = [row[0] for row in conn.execute('''
+        SELECT name FROM sqlite_master
+        WHERE type = 'table' AND name IN ('utah_grades', 'utah_rank')
+    ''')]
+    # The latest name each st_leaid went by.
+    ids = (
+        pd.concat([pd.read_sql(f'''
+            SELECT end_year, st_leaid, lea_name
+            FROM {table}
+            WHERE st_leaid IS NOT NULL
+        ''', conn) for table in tables])
+        .sort_values('end_year', kind='stable')
+        .drop_duplicates(subset='st_leaid', keep='last')
+        .sort_values('st_leaid')
+        .reset_index(drop=True)
+    )
+    st_leaids = ids['st_leaid'].astype('string')
+    fipst = pd.Series(UTAH_FIPST, index=st_leaids.index)
+
+    district = sqlite3.connect(f'file:{district_db}?mode=ro', uri=True)
+    # The accountability files don't zero pad the ids, so try them padded
+    # too in case CCD does.
+    leaid = (
+        resolve_leaid(district, st_leaids, 'ST_LEAID', fipst)
+        .fillna(resolve_leaid(district, st_leaids.str.zfill(2), 'ST_LEAID',
+                              fipst))
+    )
+    names = pd.read_sql('''
+        SELECT id_value, leaid
+        FROM leaid_crosswalk
+        WHERE id_type = 'NAME' AND fipst = ?
+        ORDER BY last_year
+    ''', district, params=(UTAH_FIPST,))
+    district.close()
+
+    crosswalk = pd.DataFrame({'st_leaid': st_leaids, 'leaid': leaid,
+                              'matched_name': pd.NA, 'match_score': pd.NA})
+    unmatched = leaid.isna()
+    if unmatched.any() and len(names):
+        matches = match_names(ids.loc[unmatched, 'lea_name'],
+                              names.set_index('leaid')['id_value'],
+                              min_score=min_score)
+        crosswalk.loc[unmatched, 'leaid'] = matches['match'].astype('Int64')
+        crosswalk.loc[unmatched, 'matched_name'] = matches['matched']
+        crosswalk.loc[unmatched, 'match_score'] = matches['score']
+
+        matched = matches.dropna(subset='match').astype({'match': 'Int64'})
+        if len(matched):
+            print(f'utah_leaid: {len(matched)} st_leaid matched by name '
+                  f'(score >= {min_score}):')
+            print(pd.concat([st_leaids[matched.index],
+                             ids.loc[matched.index, 'lea_name'], matched],
+                            axis=1).to_string(index=False))
+        missing = unmatched.sum() - len(matched)
+        if missing:
+            print(f'utah_leaid: {missing} st_leaid without a leaid')
+
+    with build_transaction(conn):
+        conn.execute('DROP TABLE IF EXISTS utah_leaid')
+        conn.execute('''
+            CREATE TABLE utah_leaid (
+                st_leaid TEXT PRIMARY KEY,
+                leaid INTEGER,
+                matched_name TEXT,
+                match_score REAL
+            )
+        ''')
+        insert_rows(conn, crosswalk, 'utah_leaid')
+        stamp_build(conn, 'load_leaid_crosswalk')
+
+def load_utah(frame, table, source, path=STATE_DATA_DB):
+    '''
+    Load frame into table in state_data.db and bring utah_leaid up to date.
+    What the prep scripts call.
+    '''
+    conn = connect(path)
+    load_table(conn, frame, table, source)
+    load_leaid_crosswalk(conn)
+    conn.close()
@@ -0,0 +1,112 @@
+'''
+Reading the Utah accountability workbooks.
+
+Each prep script reads one sheet out of each year's xlsx. read_workbooks
+opens each file once, reads just that sheet (with the calamine engine when
+python-calamine is installed, it's a lot faster than openpyxl), and keeps the
+result in a .workbook_cache folder next to the workbook, keyed on a hash of
+the file and the read options. Reruns read the cache; a changed or
+replaced workbook gets parsed again. Years that aren't cached are parsed in
+parallel.
+
+    sys.path.append('..')  # state_data/utah, for workbooks.py
+    from workbooks import read_workbooks
+    pre_rank = read_workbooks({2024: '23_RankList.xlsx', ...}, sheet=-1)
+
+The cache is Parquet, or a pickle for sheets Parquet can't hold (eg. a
+column with both numbers and '-').
+'''
+
+import os
+import hashlib
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+# None is pandas' default, openpyxl for xlsx.
+ENGINE = 'calamine' if importlib.util.find_spec('python_calamine') else None
+
+CACHE_FOLDER = '.workbook_cache'
+
+def cache_path(file_name, sheet, read_options):
+    ''' Where the parsed sheet is cached, without the extension. '''
+    digest = hashlib.sha256()
+    with open(file_name, 'rb') as file:
+        for chunk in iter(lambda: file.read(2**20), b''):
+            digest.update(chunk)
+    digest.update(repr((sheet, sorted(read_options.items()))).encode())
+    base = os.path.splitext(os.path.basename(file_name))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(file_name)),
+                        CACHE_FOLDER, f'{base}_{digest.hexdigest()[:16]}')
+
+def read_cached(path):
+    ''' The cached sheet at path, or None if there isn't one. '''
+    if os.path.exists(path + '.parquet'):
+        return pd.read_parquet(path + '.parquet')
+    if os.path.exists(path + '.pkl'):
+        return pd.read_pickle(path + '.pkl')
+    return None
+
+def write_cached(frame, path):
+    ''' Cache frame as Parquet, falling back to a pickle. '''
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        frame.to_parquet(path + '.parquet', index=False)
+        # Only keep it if it comes back the same.
+        if read_cached(path).equals(frame):
+            return
+        os.remove(path + '.parquet')
+    except (ImportError, ValueError, TypeError):
+        if os.path.exists(path + '.parquet'):
+            os.remove(path + '.parquet')
+    frame.to_pickle(path + '.pkl')
+
+def parse_sheet(file_name, sheet, read_options, path):
+    '''
+    Open file_name once, read sheet (a name, or a position like -1 for the
+    last sheet) and cache it at path.
+    '''
+    with pd.ExcelFile(file_name, engine=ENGINE) as book:
+        if isinstance(sheet, int):
+            sheet = book.sheet_names[sheet]
+        frame = book.parse(sheet, **read_options)
+    write_cached(frame, path)
+    return frame
+
+def pool_context():
+    '''
+    Process start method for parsing in parallel, None to parse one at a
+    time. The prep scripts aren't guarded by if __name__ == '__main__', so
+    spawned workers (which re-run the main script) aren't an option.
+    '''
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+def read_workbooks(file_names, sheet=0, **read_options):
+    '''
+    One sheet out of each workbook in file_names ({key: file name}) as
+    {key: DataFrame}. read_options go to pd.read_excel (eg. header=1).
+    '''
+    paths = {key: cache_path(file_name, sheet, read_options)
+             for key, file_name in file_names.items()}
+    frames = {key: read_cached(path) for key, path in paths.items()}
+    to_parse = [key for key, frame in frames.items() if frame is None]
+
+    context = pool_context()
+    if len(to_parse) > 1 and context is not None:
+        with ProcessPoolExecutor(max_workers=min(len(to_parse),
+                                                 os.cpu_count() or 1),
+                                 mp_context=context) as pool:
+            futures = {key: pool.submit(parse_sheet, file_names[key], sheet,
+                                        read_options, paths[key])
+                       for key in to_parse}
+            frames.update({key: future.result()
+                           for key, future in futures.items()})
+    else:
+        for key in to_parse:
+            frames[key] = parse_sheet(file_names[key], sheet, read_options,
+                                      paths[key])
+
+    return frames